@@ -1,13 +1,23 @@
 import streamlit as st
-import numpy as np
 import pandas as pd
+import os
 import time
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import requests
-from io import BytesIO
-import base64
+from contextlib import contextmanager
+from datetime import date, timedelta
+from modules.assets import LOGO_PATH, app_css, background_css
+from modules.features import bmi, bmi_category
+from modules.lazy import lazy_import
+from modules.leaderboard import WeeklyLeaderboard
+from modules.prediction_cache import PredictionCache
+from modules.profiling import RerunProfiler, recorder, timed
+from modules.rules import CHALLENGES, RulesEngine
+from modules.sensors import ZONES, SensorHub
+from modules.storage import FitnessStore
+
+# plotly and scikit-learn load on first use so the header paints first
+charts = lazy_import("modules.charts")
+ml_models = lazy_import("modules.ml_models")
+serving = lazy_import("modules.serving")
 
 # Set up Streamlit page config
 st.set_page_config(
@@ -17,583 +27,632 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Modern color scheme
-PRIMARY_COLOR = "#FF4B4B"
-SECONDARY_COLOR = "#0F9D58"
-BG_COLOR = "#0E1117"
-CARD_COLOR = "#192841"
-
-# Background image setup
-def add_bg_from_local(image_file):
-    with open(image_file, "rb") as image:
-        encoded_string = base64.b64encode(image.read()).decode()
-    st.markdown(
-        f"""
-        <style>
-        .stApp {{
-            background-image: url("data:image/png;base64,{encoded_string}");
-            background-size: cover;
-            background-position: center;
-            background-attachment: fixed;
-            background-color: rgba(14, 17, 23, 0.95);
-            background-blend-mode: overlay;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
-
-# Apply custom styling with enhanced features
-st.markdown(f"""
-    <style>
-    :root {{
-        --primary: {PRIMARY_COLOR};
-        --secondary: {SECONDARY_COLOR};
-    }}
-    
-    .main {{
-        background-color: transparent;
-        color: white;
-    }}
-    
-    .stButton>button {{
-        background-color: var(--primary) !important;
-        border-radius: 10px !important;
-        padding: 10px 24px !important;
-        font-weight: bold !important;
-        transition: all 0.3s ease !important;
-    }}
-    
-    .stButton>button:hover {{
-        transform: scale(1.05) !important;
-        box-shadow: 0 5px 15px rgba(255, 75, 75, 0.4) !important;
-    }}
-    
-    .stSlider .st-c7 {{
-        background-color: var(--primary) !important;
-    }}
-    
-    .stRadio [role=radiogroup] label [data-testid=stMarkdownContainer] p {{
-        font-size: 16px !important;
-    }}
-    
-    .card {{
-        background: linear-gradient(135deg, {CARD_COLOR}, #1a3a5f);
-        border-radius: 15px;
-        padding: 20px;
-        box-shadow: 0 8px 32px rgba(0,0,0,0.3);
-        margin-bottom: 20px;
-        border: 1px solid rgba(255,255,255,0.1);
-        backdrop-filter: blur(10px);
-    }}
-    
-    .metric-value {{
-        font-size: 2.5rem !important;
-        font-weight: 700 !important;
-        color: var(--primary) !important;
-        text-shadow: 0 2px 10px rgba(255, 75, 75, 0.3);
-    }}
-    
-    .progress-container {{
-        height: 8px;
-        background: #2c3e50;
-        border-radius: 4px;
-        margin: 10px 0;
-    }}
-    
-    .progress-bar {{
-        height: 100%;
-        background: linear-gradient(90deg, var(--primary), var(--secondary));
-        border-radius: 4px;
-        transition: width 0.5s ease;
-    }}
-    
-    .feature-card {{
-        transition: transform 0.3s;
-        border-radius: 10px;
-        overflow: hidden;
-        background: {CARD_COLOR};
-        padding: 15px;
-        margin-bottom: 10px;
-    }}
-    
-    .feature-card:hover {{
-        transform: translateY(-5px);
-        box-shadow: 0 10px 25px rgba(0,0,0,0.3);
-    }}
-    
-    .achievement-badge {{
-        background: linear-gradient(45deg, #FFD700, #FFA500);
-        border-radius: 50%;
-        width: 60px;
-        height: 60px;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        margin: 0 auto;
-        font-size: 24px;
-        box-shadow: 0 4px 15px rgba(255, 215, 0, 0.3);
-    }}
-    
-    .pulse-animation {{
-        animation: pulse 2s infinite;
-    }}
-    
-    @keyframes pulse {{
-        0% {{ transform: scale(1); }}
-        50% {{ transform: scale(1.05); }}
-        100% {{ transform: scale(1); }}
-    }}
-    
-    footer {{
-        text-align: center;
-        padding: 20px;
-        margin-top: 40px;
-        color: #aaa;
-    }}
-    
-    /* New styles for enhanced features */
-    .workout-card {{
-        background: linear-gradient(135deg, {PRIMARY_COLOR}20, {SECONDARY_COLOR}20);
-        border-radius: 10px;
-        padding: 15px;
-        margin: 10px 0;
-        border-left: 4px solid var(--primary);
-    }}
-    
-    .nutrition-card {{
-        background: linear-gradient(135deg, #4CAF5020, #2196F320);
-        border-radius: 10px;
-        padding: 15px;
-        margin: 10px 0;
-        border-left: 4px solid #4CAF50;
-    }}
-    
-    .challenge-card {{
-        background: linear-gradient(135deg, #9C27B020, #E91E6320);
-        border-radius: 10px;
-        padding: 15px;
-        margin: 10px 0;
-        border-left: 4px solid #9C27B0;
-    }}
-    </style>
-""", unsafe_allow_html=True)
+# Whole-script timing; the Diagnostics panel (?diagnostics=1 or
+# FITMETRICS_DIAGNOSTICS=1) can ask for the next rerun to be profiled
+rerun_started = time.perf_counter()
+SHOW_DIAGNOSTICS = (st.query_params.get("diagnostics") == "1"
+                    or os.environ.get("FITMETRICS_DIAGNOSTICS") == "1")
+profiler = RerunProfiler().start() if st.session_state.pop("profile_next_rerun", False) else None
 
-# Initialize session state for new features
-if 'workout_history' not in st.session_state:
-    st.session_state.workout_history = []
-if 'nutrition_log' not in st.session_state:
-    st.session_state.nutrition_log = []
-if 'achievements' not in st.session_state:
-    st.session_state.achievements = []
-if 'challenges' not in st.session_state:
-    st.session_state.challenges = [
-        {"name": "10K Steps Daily", "progress": 75, "target": 100},
-        {"name": "30 Day Yoga", "progress": 45, "target": 100},
-        {"name": "Hydration Master", "progress": 60, "target": 100}
+# Everything below is profiled; stop() runs even when a rerun is
+# interrupted (st.rerun, a newer rerun) or the script raises
+try:
+    # Modern color scheme
+    PRIMARY_COLOR = "#FF4B4B"
+    SECONDARY_COLOR = "#0F9D58"
+    BG_COLOR = "#0E1117"
+    CARD_COLOR = "#192841"
+    DAILY_CALORIE_GOAL = 600
+    DAILY_WORKOUT_GOAL_MIN = 45
+    DAILY_STEP_GOAL = 10_000
+    MONITOR_REFRESH_SECONDS = 2
+    HISTORY_PAGE_SIZE = 10
+    DEFAULT_CHALLENGES = [
+        {"name": challenge.name, "progress": 0, "target": 100} for challenge in CHALLENGES
     ]
 
-# Sidebar navigation
-with st.sidebar:
-    st.image("https://cdn-icons-png.flaticon.com/512/3082/3082015.png", width=80)
-    st.title("FitMetrics Pro")
-    st.markdown("### Track. Analyze. Transform.")
-    st.markdown("Monitor your fitness journey with AI-powered insights")
-    
-    # User profile section
-    st.subheader("👤 Your Profile")
-    user_name = st.text_input("Name", "Aswini Shetty")
-    fitness_level = st.selectbox("Fitness Level", ["Beginner", "Intermediate", "Advanced"])
-    
-    # Quick stats
-    st.subheader("📊 Quick Stats")
-    st.metric("Current Streak", "7 days 🔥")
-    st.metric("Total Workouts", "24")
-    st.metric("Calories Burned", "12,450 kcal")
-    
-    # Features with icons
-    st.subheader("✨ Premium Features")
-    features = [
-        {"icon": "📈", "name": "Performance Analytics"},
-        {"icon": "🎯", "name": "Smart Goal Setting"},
-        {"icon": "🧠", "name": "AI Health Insights"},
-        {"icon": "🏆", "name": "Achievement Badges"},
-        {"icon": "🤝", "name": "Community Challenges"},
-        {"icon": "📊", "name": "Body Composition"},
-        {"icon": "🍎", "name": "Nutrition Tracking"},
-        {"icon": "💤", "name": "Sleep Analysis"}
-    ]
+    # Loaded once per server process and shared by every session. The artifact
+    # from `python -m modules.train` is memory-mapped so several workers share it;
+    # without one we fall back to training in-process.
+    @st.cache_resource(show_spinner="Loading calorie model...", max_entries=1)
+    def get_calorie_model(model_path):
+        with timed("model_load"):
+            if model_path is not None:
+                return ml_models.load_model(model_path, mmap_mode="r")
+            return ml_models.train_model()
+
+    # models/LATEST is re-read on every run, so a newly trained artifact replaces
+    # the loaded one without a restart
+    def current_calorie_model():
+        return get_calorie_model(ml_models.latest_model_path())
+
+    # With FITMETRICS_PREDICT_SERVER set (host:port or unix:/path of a running
+    # `python -m modules.serving`) predictions are batched across sessions by the
+    # server; the in-process model is only loaded if the server is unreachable.
+    def get_predictor():
+        address = os.environ.get("FITMETRICS_PREDICT_SERVER")
+        if not address:
+            return current_calorie_model()
+        return get_prediction_client(address)
+
+    @st.cache_resource
+    def get_prediction_client(address):
+        return serving.PredictionClient(address, fallback=current_calorie_model)
+
+    # Predictions for identical slider tuples are shared by every session
+    @st.cache_resource
+    def get_prediction_cache():
+        return PredictionCache()
+
+    def predict_calories(age, weight, height, duration, heart_rate, gender):
+        predictor = get_predictor()
+        cache = get_prediction_cache()
+        if cache.version != getattr(predictor, "version", None):
+            # New model version: drop stale entries and refill the common inputs
+            cache.prewarm(predictor)
+        kcal, latency_ms = cache.predict_one(predictor, age, weight, height, duration,
+                                             heart_rate, gender)
+        return predictor, kcal, latency_ms
+
+    # One SQLite store (and connection pool) shared by every session
+    @st.cache_resource
+    def get_store():
+        return FitnessStore()
+
+    # Default challenges are created the first time a name is seen in this
+    # process, not on every rerun
+    @st.cache_resource(max_entries=10_000)
+    def seed_default_challenges(user):
+        get_store().seed_challenges(user, DEFAULT_CHALLENGES)
+
+    # Weekly ranks are rebuilt from the rollups every 15 minutes and follow new
+    # workouts in between, so a page view never sorts the user base
+    @st.cache_resource
+    def get_leaderboard():
+        return WeeklyLeaderboard(get_store(), refresh_seconds=900).start()
+
+    # Achievements and challenge progress update as each workout is committed;
+    # the logged history is replayed once when the process starts
+    @st.cache_resource(show_spinner="Evaluating achievements...")
+    def get_rules_engine():
+        return RulesEngine(get_store())
+
+    # Wearable samples stream into one hub per server process. FITMETRICS_SENSORS
+    # is host:port or unix:/path to listen on, file:/path to tail, or "replay" to
+    # simulate each viewer's stream from exercise.csv; unset, the monitor waits
+    # for sensor data.
+    @st.cache_resource
+    def get_sensor_hub(source):
+        hub = SensorHub()
+        return hub.start(source) if source else hub
+
+    sensors = get_sensor_hub(os.environ.get("FITMETRICS_SENSORS"))
+
+    # Per-section render time, shown under each section and kept for Diagnostics
+    @contextmanager
+    def render_timer(section):
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        recorder.record(f"section.{section}", elapsed)
+        st.caption(f"⏱️ Rendered in {elapsed * 1000:.1f} ms")
+
+    # Background image setup
+    def add_bg_from_local(image_file, max_bytes=200_000, static=False):
+        # The CSS (and base64 image) is built once per process and reused until
+        # the file changes; static=True links to static/ instead of inlining it
+        st.markdown(background_css(image_file, max_bytes, static), unsafe_allow_html=True)
+
+    # Apply custom styling with enhanced features
+    st.markdown(app_css(PRIMARY_COLOR, SECONDARY_COLOR, CARD_COLOR), unsafe_allow_html=True)
+
+    # History lives in the store; the session only keeps its paging position
+    store = get_store()
+    rules = get_rules_engine()
+    if 'history_cursors' not in st.session_state:
+        st.session_state.history_cursors = [None]
+
+    # Sidebar navigation
+    with st.sidebar:
+        st.image(LOGO_PATH, width=80)
+        st.title("FitMetrics Pro")
+        st.markdown("### Track. Analyze. Transform.")
+        st.markdown("Monitor your fitness journey with AI-powered insights")
+    
+        # User profile section
+        st.subheader("👤 Your Profile")
+        user_name = st.text_input("Name", "Aswini Shetty")
+        seed_default_challenges(user_name)
+        fitness_level = st.selectbox("Fitness Level", ["Beginner", "Intermediate", "Advanced"])
+    
+        # Quick stats
+        st.subheader("📊 Quick Stats")
+        # Logged workouts are queued; the rules engine sees them once written
+        store.flush()
+        stats = rules.state(user_name)
+        st.metric("Current Streak", f"{stats.current_streak()} days 🔥")
+        st.metric("Total Workouts", f"{stats.workouts:,}")
+        st.metric("Calories Burned", f"{stats.calories:,.0f} kcal")
+    
+        # Features with icons
+        st.subheader("✨ Premium Features")
+        features = [
+            {"icon": "📈", "name": "Performance Analytics"},
+            {"icon": "🎯", "name": "Smart Goal Setting"},
+            {"icon": "🧠", "name": "AI Health Insights"},
+            {"icon": "🏆", "name": "Achievement Badges"},
+            {"icon": "🤝", "name": "Community Challenges"},
+            {"icon": "📊", "name": "Body Composition"},
+            {"icon": "🍎", "name": "Nutrition Tracking"},
+            {"icon": "💤", "name": "Sleep Analysis"}
+        ]
     
-    cols = st.columns(2)
-    for i, feature in enumerate(features):
-        with cols[i % 2]:
-            with st.container():
-                st.markdown(f"""
+        cols = st.columns(2)
+        for i, feature in enumerate(features):
+            with cols[i % 2]:
+                with st.container():
+                    st.markdown(f"""
                     <div class='feature-card'>
                         <div style="font-size:24px">{feature['icon']}</div>
                         <div>{feature['name']}</div>
                     </div>
                 """, unsafe_allow_html=True)
 
-# Main page layout
-st.title("⚡ FitSynapse")
-st.markdown("Leverage data-driven insights to optimize your fitness journey")
+    # Main page layout
+    st.title("⚡ FitSynapse")
+    st.markdown("Leverage data-driven insights to optimize your fitness journey")
 
-# NEW: Real-time Activity Tracker
-with st.container():
-    st.header("🎯 Real-time Activity Monitor")
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(f"""
-            <div class="card pulse-animation">
-                <h3>Live Heart Rate</h3>
-                <div class="metric-value">72 BPM</div>
-                <p>Normal resting rate</p>
-            </div>
-        """, unsafe_allow_html=True)
+    # NEW: Real-time Activity Tracker
+    # Re-runs on its own every few seconds, reading the hub's rolling stats
+    @st.fragment(run_every=MONITOR_REFRESH_SECONDS)
+    def render_activity_monitor(user_name):
+        with st.container(), render_timer("activity_monitor"):
+            st.header("🎯 Real-time Activity Monitor")
+            sensors.follow(user_name)
+            live = sensors.snapshot(user_name) or {"live": False, "active_calories": 0.0,
+                                                   "steps": 0, "calories_per_minute": 0.0,
+                                                   "zone_minutes": dict.fromkeys(ZONES, 0.0)}
+            col1, col2, col3, col4 = st.columns(4)
+    
+            with col1:
+                if live["live"]:
+                    heart_rate = f"{live['heart_rate']} BPM"
+                    detail = (f"{live['zone']} zone · {live['heart_rate_min']:.0f}-"
+                              f"{live['heart_rate_max']:.0f} last minute")
+                else:
+                    heart_rate, detail = "--", "Waiting for sensor data"
+                st.markdown(f"""
+                <div class="card{' pulse-animation' if live['live'] else ''}">
+                    <h3>Live Heart Rate</h3>
+                    <div class="metric-value">{heart_rate}</div>
+                    <p>{detail}</p>
+                </div>
+            """, unsafe_allow_html=True)
         
-    with col2:
-        st.markdown(f"""
-            <div class="card">
-                <h3>Active Calories</h3>
-                <div class="metric-value">412</div>
-                <p>Calories burned today</p>
-            </div>
-        """, unsafe_allow_html=True)
+            with col2:
+                st.markdown(f"""
+                <div class="card">
+                    <h3>Active Calories</h3>
+                    <div class="metric-value">{live['active_calories']:.0f}</div>
+                    <p>Burned today · {live['calories_per_minute']:.1f} kcal/min now</p>
+                </div>
+            """, unsafe_allow_html=True)
         
-    with col3:
-        st.markdown(f"""
-            <div class="card">
-                <h3>Step Count</h3>
-                <div class="metric-value">8,542</div>
-                <p>85% of daily goal</p>
-            </div>
-        """, unsafe_allow_html=True)
+            with col3:
+                st.markdown(f"""
+                <div class="card">
+                    <h3>Step Count</h3>
+                    <div class="metric-value">{live['steps']:,}</div>
+                    <p>{live['steps'] / DAILY_STEP_GOAL:.0%} of daily goal</p>
+                </div>
+            """, unsafe_allow_html=True)
         
-    with col4:
-        st.markdown(f"""
-            <div class="card">
-                <h3>Sleep Score</h3>
-                <div class="metric-value">87</div>
-                <p>Quality sleep achieved</p>
-            </div>
-        """, unsafe_allow_html=True)
+            with col4:
+                active_minutes = sum(list(live["zone_minutes"].values())[2:])
+                st.markdown(f"""
+                <div class="card">
+                    <h3>Zone Minutes</h3>
+                    <div class="metric-value">{active_minutes:.0f}</div>
+                    <p>Fat burn zone or higher today</p>
+                </div>
+            """, unsafe_allow_html=True)
 
-# User Input Section
-with st.container():
-    st.header("📋 Fitness Profile")
-    col1, col2, col3 = st.columns([1,1,1])
-    
-    with col1:
-        st.subheader("Personal Stats")
-        age = st.slider('Age', 1, 100, 28, help="Your current age")
-        weight = st.number_input('Weight (kg)', 40, 200, 75)
-        height = st.number_input('Height (cm)', 120, 220, 175)
-        
-    with col2:
-        st.subheader("Activity Metrics")
-        duration = st.slider('Workout Duration (min)', 1, 180, 45)
-        heart_rate = st.slider('Heart Rate (BPM)', 50, 200, 125)
-        steps = st.slider('Daily Steps', 1000, 25000, 8500)
+    render_activity_monitor(user_name)
+
+    # User Input Section
+    with st.container(), render_timer("profile"):
+        st.header("📋 Fitness Profile")
+        col1, col2, col3 = st.columns([1,1,1])
+    
+        with col1:
+            st.subheader("Personal Stats")
+            age = st.slider('Age', 1, 100, 28, help="Your current age")
+            weight = st.number_input('Weight (kg)', 40, 200, 75)
+            height = st.number_input('Height (cm)', 120, 220, 175)
         
-    with col3:
-        st.subheader("Body Composition")
-        body_fat = st.slider('Body Fat %', 5, 50, 18)
-        muscle_mass = st.slider('Muscle Mass %', 30, 90, 65)
-        gender = st.radio("Gender", ("Male", "Female", "Other"))
+        with col2:
+            st.subheader("Activity Metrics")
+            duration = st.slider('Workout Duration (min)', 1, 180, 45)
+            heart_rate = st.slider('Heart Rate (BPM)', 50, 200, 125)
+            steps = st.slider('Daily Steps', 1000, 25000, 8500)
         
-    # Calculate BMI
-    bmi = weight / ((height/100) ** 2)
-    bmi_status = "Healthy" if 18.5 <= bmi <= 24.9 else "Needs improvement"
-    st.info(f"**Your BMI:** {bmi:.1f} - {bmi_status}")
-
-# NEW: Workout Planner Section
-with st.container():
-    st.header("🏋️ Smart Workout Planner")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("Today's Recommended Workout")
-        workout_type = st.selectbox("Workout Focus", ["Cardio", "Strength", "HIIT", "Yoga", "Recovery"])
+        with col3:
+            st.subheader("Body Composition")
+            body_fat = st.slider('Body Fat %', 5, 50, 18)
+            muscle_mass = st.slider('Muscle Mass %', 30, 90, 65)
+            gender = st.radio("Gender", ("Male", "Female", "Other"))
         
-        if workout_type == "Cardio":
-            st.markdown("""
-            <div class="workout-card">
-                <h4>🏃‍♂️ Cardio Blast</h4>
-                <p>• 30 min Running (moderate pace)</p>
-                <p>• 15 min Cycling (high intensity)</p>
-                <p>• 10 min Jump Rope intervals</p>
-                <p>🔥 Estimated burn: 450 calories</p>
-            </div>
-            """, unsafe_allow_html=True)
-        elif workout_type == "Strength":
-            st.markdown("""
-            <div class="workout-card">
-                <h4>💪 Strength Training</h4>
-                <p>• 4x10 Bench Press</p>
-                <p>• 3x12 Squats</p>
-                <p>• 3x15 Deadlifts</p>
-                <p>• 3x12 Shoulder Press</p>
-                <p>🔥 Estimated burn: 380 calories</p>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    with col2:
-        st.subheader("Weekly Progress")
-        # Weekly progress chart
-        days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        completion = [85, 90, 75, 95, 80, 65, 70]
+        # Calculate BMI
+        user_bmi = float(bmi([weight], [height])[0])
+        bmi_status = bmi_category([user_bmi])[0] or "Out of range"
+        st.info(f"**Your BMI:** {user_bmi:.1f} - {bmi_status}")
+
+    # Heart-rate zones and calorie estimates in the live monitor use this profile
+    sensors.set_profile(user_name, age=age, weight=weight, gender=gender)
+
+    # NEW: Workout Planner Section
+    @st.fragment
+    def render_workout_planner(user_name):
+        with st.container(), render_timer("workout_planner"):
+            st.header("🏋️ Smart Workout Planner")
+    
+            col1, col2 = st.columns(2)
+    
+            with col1:
+                st.subheader("Today's Recommended Workout")
+                workout_type = st.selectbox("Workout Focus", ["Cardio", "Strength", "HIIT", "Yoga", "Recovery"],
+                                            key="workout_type")
         
-        fig = go.Figure(data=[
-            go.Bar(name='Completion %', x=days, y=completion, 
-                  marker_color=PRIMARY_COLOR)
-        ])
-        fig.update_layout(
-            title="Weekly Workout Completion",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white'
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-# NEW: Nutrition Tracking Section
-with st.container():
-    st.header("🍎 Nutrition & Hydration")
-    
-    col1, col2 = st.columns(2)
+                if workout_type == "Cardio":
+                    st.markdown("""
+                <div class="workout-card">
+                    <h4>🏃‍♂️ Cardio Blast</h4>
+                    <p>• 30 min Running (moderate pace)</p>
+                    <p>• 15 min Cycling (high intensity)</p>
+                    <p>• 10 min Jump Rope intervals</p>
+                    <p>🔥 Estimated burn: 450 calories</p>
+                </div>
+                """, unsafe_allow_html=True)
+                elif workout_type == "Strength":
+                    st.markdown("""
+                <div class="workout-card">
+                    <h4>💪 Strength Training</h4>
+                    <p>• 4x10 Bench Press</p>
+                    <p>• 3x12 Squats</p>
+                    <p>• 3x15 Deadlifts</p>
+                    <p>• 3x12 Shoulder Press</p>
+                    <p>🔥 Estimated burn: 380 calories</p>
+                </div>
+                """, unsafe_allow_html=True)
     
-    with col1:
-        st.subheader("Daily Nutrition")
-        nutrition_data = {
-            'Macro': ['Protein', 'Carbs', 'Fats'],
-            'Current': [120, 250, 65],
-            'Target': [140, 300, 70]
-        }
-        df_nutrition = pd.DataFrame(nutrition_data)
+            with col2:
+                st.subheader("Weekly Progress")
+                # Weekly progress chart from this week's daily rollups
+                days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+                week_start = date.today() - timedelta(days=date.today().weekday())
+                this_week = store.daily_window(user_name, days=7, end=week_start + timedelta(days=6))
+                completion = (this_week['duration_min'] / DAILY_WORKOUT_GOAL_MIN * 100).clip(upper=100).tolist()
         
-        fig = px.bar(df_nutrition, x='Macro', y=['Current', 'Target'], 
-                    barmode='group', title="Macronutrient Intake")
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white'
-        )
-        st.plotly_chart(fig, use_container_width=True)
-    
-    with col2:
-        st.subheader("Hydration Tracker")
-        water_intake = st.slider("Water Intake (ml)", 0, 4000, 2100, 100)
-        st.markdown(f"""
-        <div class="nutrition-card">
-            <h4>💧 Hydration Status</h4>
-            <p>Current: {water_intake}ml / 3000ml</p>
-            <div class="progress-container">
-                <div class="progress-bar" style="width: {water_intake/3000*100}%"></div>
-            </div>
-            <p>{'👍 Good job!' if water_intake >= 2000 else '💪 Keep drinking!'}</p>
-        </div>
-        """, unsafe_allow_html=True)
+                st.plotly_chart(charts.completion_chart(days, completion, PRIMARY_COLOR), use_container_width=True)
 
-# Prediction Section
-with st.container():
-    st.header("🔥 Calories Burned Prediction")
-    
-    # Simulate processing
-    with st.spinner("Analyzing your metrics with AI..."):
-        time.sleep(1.5)
-    
-    # Create metrics cards
-    col1, col2, col3 = st.columns(3)
+    render_workout_planner(user_name)
+
+    # NEW: Nutrition Tracking Section
+    @st.fragment
+    def render_nutrition(user_name):
+        with st.container(), render_timer("nutrition"):
+            st.header("🍎 Nutrition & Hydration")
+    
+            col1, col2 = st.columns(2)
+    
+            with col1:
+                st.subheader("Daily Nutrition")
+                nutrition_data = {
+                    'Macro': ['Protein', 'Carbs', 'Fats'],
+                    'Current': [120, 250, 65],
+                    'Target': [140, 300, 70]
+                }
+                df_nutrition = pd.DataFrame(nutrition_data)
+        
+                st.plotly_chart(charts.bar_chart(df_nutrition, 'Macro', ['Current', 'Target'], "Macronutrient Intake"),
+                                use_container_width=True)
     
-    with col1:
-        st.markdown(f"""
-            <div class="card">
-                <h3>Estimated Calories</h3>
-                <div class="metric-value">412 kcal</div>
+            with col2:
+                st.subheader("Hydration Tracker")
+                water_intake = st.slider("Water Intake (ml)", 0, 4000, 2100, 100)
+                st.markdown(f"""
+            <div class="nutrition-card">
+                <h4>💧 Hydration Status</h4>
+                <p>Current: {water_intake}ml / 3000ml</p>
                 <div class="progress-container">
-                    <div class="progress-bar" style="width: 65%"></div>
+                    <div class="progress-bar" style="width: {water_intake/3000*100}%"></div>
                 </div>
-                <p>65% of daily goal</p>
+                <p>{'👍 Good job!' if water_intake >= 2000 else '💪 Keep drinking!'}</p>
             </div>
-        """, unsafe_allow_html=True)
-        
-    with col2:
-        st.markdown(f"""
-            <div class="card">
-                <h3>Metabolic Rate</h3>
-                <div class="metric-value">1,850 kcal</div>
-                <div class="progress-container">
-                    <div class="progress-bar" style="width: 82%"></div>
+            """, unsafe_allow_html=True)
+                if st.button("💧 Log Intake", use_container_width=True):
+                    store.log_nutrition(user=user_name, water_ml=water_intake)
+                st.caption(f"Logged today: {store.water_today(user_name):,.0f} ml")
+
+    render_nutrition(user_name)
+
+    # Prediction Section
+    @st.fragment
+    def render_prediction(user_name, age, weight, height, duration, heart_rate, steps, gender):
+        with st.container(), render_timer("prediction"):
+            st.header("🔥 Calories Burned Prediction")
+    
+            calorie_model, predicted_calories, inference_ms = predict_calories(
+                age, weight, height, duration, heart_rate, gender
+            )
+            recorder.record("predict", inference_ms / 1000)
+            goal_percent = min(predicted_calories / DAILY_CALORIE_GOAL * 100, 100)
+    
+            # Create metrics cards
+            col1, col2, col3 = st.columns(3)
+    
+            with col1:
+                st.markdown(f"""
+                <div class="card">
+                    <h3>Estimated Calories</h3>
+                    <div class="metric-value">{predicted_calories:,.0f} kcal</div>
+                    <div class="progress-container">
+                        <div class="progress-bar" style="width: {goal_percent:.0f}%"></div>
+                    </div>
+                    <p>{goal_percent:.0f}% of daily goal</p>
                 </div>
-                <p>Daily energy expenditure</p>
-            </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
         
-    with col3:
-        st.markdown(f"""
-            <div class="card">
-                <h3>Fitness Score</h3>
-                <div class="metric-value">86/100</div>
-                <div class="progress-container">
-                    <div class="progress-bar" style="width: 86%"></div>
+            with col2:
+                st.markdown(f"""
+                <div class="card">
+                    <h3>Metabolic Rate</h3>
+                    <div class="metric-value">1,850 kcal</div>
+                    <div class="progress-container">
+                        <div class="progress-bar" style="width: 82%"></div>
+                    </div>
+                    <p>Daily energy expenditure</p>
                 </div>
-                <p>Excellent condition</p>
-            </div>
-        """, unsafe_allow_html=True)
-
-# NEW: Achievements & Challenges Section
-with st.container():
-    st.header("🏆 Achievements & Challenges")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("Your Achievements")
-        achievements = [
-            {"icon": "🔥", "name": "7-Day Streak", "earned": True},
-            {"icon": "💪", "name": "First 10K", "earned": True},
-            {"icon": "🏃", "name": "Marathon Ready", "earned": False},
-            {"icon": "🧘", "name": "Yoga Master", "earned": True},
-            {"icon": "🏆", "name": "Elite Status", "earned": False}
-        ]
+            """, unsafe_allow_html=True)
         
-        for achievement in achievements:
-            status = "✅" if achievement["earned"] else "⏳"
-            st.markdown(f"{status} {achievement['icon']} {achievement['name']}")
-    
-    with col2:
-        st.subheader("Active Challenges")
-        for challenge in st.session_state.challenges:
-            progress_percent = (challenge['progress'] / challenge['target']) * 100
-            st.markdown(f"""
-            <div class="challenge-card">
-                <h4>{challenge['name']}</h4>
-                <div class="progress-container">
-                    <div class="progress-bar" style="width: {progress_percent}%"></div>
+            with col3:
+                st.markdown(f"""
+                <div class="card">
+                    <h3>Fitness Score</h3>
+                    <div class="metric-value">86/100</div>
+                    <div class="progress-container">
+                        <div class="progress-bar" style="width: 86%"></div>
+                    </div>
+                    <p>Excellent condition</p>
                 </div>
-                <p>{challenge['progress']}% Complete</p>
-            </div>
             """, unsafe_allow_html=True)
-
-# Visualization Section
-with st.container():
-    st.header("📊 Performance Analytics")
-    
-    # Generate fitness data
-    dates = [datetime.now() - timedelta(days=i) for i in range(7, 0, -1)]
-    activity_data = pd.DataFrame({
-        'Date': dates,
-        'Calories Burned': np.random.randint(300, 600, 7),
-        'Workout Duration': np.random.randint(20, 90, 7),
-        'Steps': np.random.randint(5000, 15000, 7),
-        'Heart Rate': np.random.randint(110, 160, 7)
-    })
     
-    # Create tabs for different visualizations
-    tab1, tab2, tab3, tab4 = st.tabs(["Weekly Trend", "Body Composition", "Performance Metrics", "Sleep Analysis"])
-    
-    with tab1:
-        fig = px.line(activity_data, x='Date', y='Calories Burned', 
-                      title='Weekly Calories Burned', markers=True)
-        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color='white')
-        st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"Model inference: {inference_ms:.2f} ms · test MAE {calorie_model.metrics['mae']:.1f} kcal")
+    
+            if st.button("💾 Log This Workout", use_container_width=True):
+                store.log_workout(user=user_name, workout_type=st.session_state.workout_type,
+                                  duration_min=duration, calories=round(predicted_calories, 1),
+                                  steps=steps, heart_rate=heart_rate)
+                st.session_state.history_cursors = [None]
+                st.toast("Workout saved!")
+                # Charts in the other sections depend on the new workout
+                st.rerun()
+    
+            with st.expander("📜 Workout History"):
+                cursors = st.session_state.history_cursors
+                page = store.workouts(user_name, limit=HISTORY_PAGE_SIZE, before=cursors[-1])
+                if page.rows:
+                    history = pd.DataFrame(page.rows)
+                    st.dataframe(history[['day', 'workout_type', 'duration_min', 'calories', 'steps', 'heart_rate']],
+                                 hide_index=True, use_container_width=True)
+                else:
+                    st.caption("No workouts logged yet.")
+                newer_col, older_col = st.columns(2)
+                if newer_col.button("← Newer", disabled=len(cursors) == 1):
+                    cursors.pop()
+                    st.rerun(scope="fragment")
+                if older_col.button("Older →", disabled=page.next_cursor is None):
+                    cursors.append(page.next_cursor)
+                    st.rerun(scope="fragment")
+
+    render_prediction(user_name, age, weight, height, duration, heart_rate, steps, gender)
+
+    # NEW: Achievements & Challenges Section
+    @st.fragment
+    def render_achievements(user_name):
+        with st.container(), render_timer("achievements"):
+            st.header("🏆 Achievements & Challenges")
+    
+            col1, col2 = st.columns(2)
+    
+            with col1:
+                st.subheader("Your Achievements")
+                for achievement, earned, percent in rules.achievement_status(user_name):
+                    status = "✅" if earned else "⏳"
+                    remaining = "" if earned else f" ({percent:.0f}%)"
+                    st.markdown(f"{status} {achievement.icon} {achievement.name}{remaining}")
+    
+            with col2:
+                st.subheader("Active Challenges")
+                for challenge, progress_percent in rules.challenge_progress(user_name):
+                    st.markdown(f"""
+                <div class="challenge-card">
+                    <h4>{challenge.name}</h4>
+                    <div class="progress-container">
+                        <div class="progress-bar" style="width: {progress_percent}%"></div>
+                    </div>
+                    <p>{progress_percent:.0f}% Complete</p>
+                </div>
+                """, unsafe_allow_html=True)
+
+    render_achievements(user_name)
+
+    # Visualization Section
+    @st.fragment
+    def render_analytics(user_name):
+        with st.container(), render_timer("analytics"):
+            st.header("📊 Performance Analytics")
+    
+            # Served from the pre-aggregated rollups, so the cost doesn't grow with history
+            daily = store.daily_window(user_name, days=7)
+            activity_data = pd.DataFrame({
+                'Date': pd.to_datetime(daily.index),
+                'Calories Burned': daily['calories'].to_numpy(),
+                'Workout Duration': daily['duration_min'].to_numpy(),
+                'Steps': daily['steps'].to_numpy(),
+                'Heart Rate': daily['hr_mean'].to_numpy()
+            })
+    
+            # Create tabs for different visualizations
+            tab1, tab2, tab3, tab4 = st.tabs(["Weekly Trend", "Body Composition", "Performance Metrics", "Sleep Analysis"])
+    
+            with tab1:
+                trend_period = st.radio("Period", ["Daily", "Weekly", "Monthly"], horizontal=True)
+                if trend_period == "Daily":
+                    trend = activity_data
+                else:
+                    period, lookback = ("week", 7 * 12) if trend_period == "Weekly" else ("month", 365)
+                    rollup = store.rollup(user_name, period, start=date.today() - timedelta(days=lookback))
+                    trend = pd.DataFrame({'Date': rollup.index, 'Calories Burned': rollup['calories'].to_numpy()})
+                st.plotly_chart(charts.line_chart(trend, 'Date', 'Calories Burned', f'{trend_period} Calories Burned'),
+                                use_container_width=True)
         
-    with tab2:
-        body_data = pd.DataFrame({
-            'Metric': ['Body Fat', 'Muscle Mass', 'Hydration', 'Bone Density'],
-            'Value': [18, 65, 72, 92],
-            'Target': [15, 70, 80, 95]
-        })
-        fig = px.bar(body_data, x='Metric', y=['Value', 'Target'], barmode='group',
-                     title='Body Composition Analysis')
-        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color='white')
-        st.plotly_chart(fig, use_container_width=True)
+            with tab2:
+                body_data = pd.DataFrame({
+                    'Metric': ['Body Fat', 'Muscle Mass', 'Hydration', 'Bone Density'],
+                    'Value': [18, 65, 72, 92],
+                    'Target': [15, 70, 80, 95]
+                })
+                st.plotly_chart(charts.bar_chart(body_data, 'Metric', ['Value', 'Target'], 'Body Composition Analysis'),
+                                use_container_width=True)
         
-    with tab3:
-        fig = px.scatter(activity_data, x='Workout Duration', y='Calories Burned', 
-                         size='Heart Rate', color='Steps',
-                         title='Workout Efficiency Analysis')
-        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color='white')
-        st.plotly_chart(fig, use_container_width=True)
+            with tab3:
+                workout_days = activity_data.dropna(subset=['Heart Rate'])
+                st.plotly_chart(charts.scatter_chart(workout_days, 'Workout Duration', 'Calories Burned',
+                                                     'Heart Rate', 'Steps', 'Workout Efficiency Analysis'),
+                                use_container_width=True)
         
-    with tab4:
-        # NEW: Sleep Analysis
-        sleep_data = pd.DataFrame({
-            'Day': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
-            'Hours': [7.5, 6.8, 7.2, 8.1, 7.0, 8.5, 7.8],
-            'Quality': [85, 75, 80, 90, 78, 92, 88]
-        })
-        fig = px.line(sleep_data, x='Day', y=['Hours', 'Quality'], 
-                      title='Weekly Sleep Analysis', markers=True)
-        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color='white')
-        st.plotly_chart(fig, use_container_width=True)
-
-# Health Insights
-with st.container():
-    st.header("💡 AI-Powered Health Insights")
-    
-    cols = st.columns(2)
-    with cols[0]:
-        with st.expander("📌 Nutritional Recommendations", expanded=True):
-            st.markdown("""
-            - **Increase protein intake** to 1.8g/kg body weight for muscle recovery
-            - **Hydration target:** 3L water daily (currently at 2.1L)
-            - **Add superfoods:** Chia seeds, blueberries, spinach
-            - **Supplement suggestion:** Omega-3 and Vitamin D3
-            """)
+            with tab4:
+                # NEW: Sleep Analysis
+                sleep_data = pd.DataFrame({
+                    'Day': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+                    'Hours': [7.5, 6.8, 7.2, 8.1, 7.0, 8.5, 7.8],
+                    'Quality': [85, 75, 80, 90, 78, 92, 88]
+                })
+                st.plotly_chart(charts.line_chart(sleep_data, 'Day', ['Hours', 'Quality'], 'Weekly Sleep Analysis'),
+                                use_container_width=True)
+
+    render_analytics(user_name)
+
+    # Health Insights
+    @st.fragment
+    def render_insights():
+        with st.container(), render_timer("insights"):
+            st.header("💡 AI-Powered Health Insights")
+    
+            cols = st.columns(2)
+            with cols[0]:
+                with st.expander("📌 Nutritional Recommendations", expanded=True):
+                    st.markdown("""
+                - **Increase protein intake** to 1.8g/kg body weight for muscle recovery
+                - **Hydration target:** 3L water daily (currently at 2.1L)
+                - **Add superfoods:** Chia seeds, blueberries, spinach
+                - **Supplement suggestion:** Omega-3 and Vitamin D3
+                """)
             
-    with cols[1]:
-        with st.expander("🏋️ Workout Optimization", expanded=True):
-            st.markdown("""
-            - **Optimal workout window:** 6:00-8:00 AM (based on chronotype)
-            - **Recovery suggestion:** Add yoga 2x/week for flexibility
-            - **New exercise:** Try kettlebell swings for core activation
-            - **Progress plateau:** Increase weights by 5% next week
-            """)
-    
-    # NEW: AI Recommendation Button with enhanced functionality
-    col1, col2 = st.columns([3, 1])
-    with col1:
-        st.success("💡 **AI Recommendation:** Increase cardio duration by 15% to reach your calorie target faster. Consider adding HIIT workouts 3x/week.")
-    with col2:
-        if st.button("🔄 Generate New AI Insights", use_container_width=True):
-            st.balloons()
-            st.success("New AI insights generated! Check your recommendations.")
-
-# NEW: Community & Social Features
-with st.container():
-    st.header("🤝 Fitness Community")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.metric("Global Rank", "#1,247", "↑ 15")
-    with col2:
-        st.metric("Friends", "28", "↑ 3")
-    with col3:
-        st.metric("Weekly Challenges", "5", "Active")
-    
-    st.button("Join Community Challenge", use_container_width=True)
+            with cols[1]:
+                with st.expander("🏋️ Workout Optimization", expanded=True):
+                    st.markdown("""
+                - **Optimal workout window:** 6:00-8:00 AM (based on chronotype)
+                - **Recovery suggestion:** Add yoga 2x/week for flexibility
+                - **New exercise:** Try kettlebell swings for core activation
+                - **Progress plateau:** Increase weights by 5% next week
+                """)
+    
+            # NEW: AI Recommendation Button with enhanced functionality
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.success("💡 **AI Recommendation:** Increase cardio duration by 15% to reach your calorie target faster. Consider adding HIIT workouts 3x/week.")
+            with col2:
+                if st.button("🔄 Generate New AI Insights", use_container_width=True):
+                    st.balloons()
+                    st.success("New AI insights generated! Check your recommendations.")
+
+    render_insights()
 
-# Footer Section
-st.markdown("---")
-st.markdown("""
+    # NEW: Community & Social Features
+    @st.fragment
+    def render_community(user_name):
+        with st.container(), render_timer("community"):
+            st.header("🤝 Fitness Community")
+    
+            leaderboard = get_leaderboard()
+            rank, ranked_users, rank_change = leaderboard.standing(user_name)
+            active_challenges = sum(c['progress'] < c['target'] for c in store.challenges(user_name))
+            col1, col2, col3 = st.columns(3)
+    
+            with col1:
+                st.metric("Global Rank", f"#{rank:,}" if rank else "Unranked",
+                          f"{rank_change:+d}" if rank_change else None)
+            with col2:
+                st.metric("Active This Week", f"{ranked_users:,}",
+                          f"{ranked_users - len(leaderboard.previous):+d}")
+            with col3:
+                st.metric("Weekly Challenges", active_challenges, "Active")
+    
+            top = leaderboard.current.top(5)
+            if top:
+                st.dataframe(pd.DataFrame(top, columns=["Rank", "User", "Calories This Week"]).round(0),
+                             hide_index=True, use_container_width=True)
+    
+            st.button("Join Community Challenge", use_container_width=True)
+
+    render_community(user_name)
+
+    # Footer Section
+    st.markdown("---")
+    st.markdown("""
     <footer>
         <p>Developed with ❤️ using Streamlit | FitMetrics Pro v397.0</p>
         <p>© 2024 ASWINI DEVI MEDISETTI. All Rights Reserved. | Privacy Policy | Terms of Service</p>
     </footer>
 """, unsafe_allow_html=True)
 
-# Instructions for background image
-st.sidebar.markdown("---")
-st.sidebar.info("""
+    # Instructions for background image
+    st.sidebar.markdown("---")
+    st.sidebar.info("""
 **To add background image:**
 1. Save a fitness image as 'bg.jpg'
 2. Place it in same folder
 3. Uncomment the add_bg_from_local() call
 """)
 
-# Uncomment below and add your background image file
-# add_bg_from_local('bg.jpg')
\ No newline at end of file
+    # Uncomment below and add your background image file
+    # add_bg_from_local('bg.jpg')
+
+    recorder.record("rerun", time.perf_counter() - rerun_started)
+finally:
+    if profiler is not None:
+        st.session_state.profile_report = profiler.stop()
+
+if SHOW_DIAGNOSTICS:
+    with st.sidebar.expander("⚙️ Diagnostics"):
+        st.caption("Latency percentiles (ms) over the last samples in this server process")
+        st.dataframe(pd.DataFrame(recorder.summary()), hide_index=True)
+        st.caption("Prediction cache")
+        st.json(get_prediction_cache().stats(), expanded=False)
+        predictor = get_predictor()
+        if hasattr(predictor, "stats"):
+            st.caption("Prediction server")
+            st.json(predictor.stats(), expanded=False)
+        st.caption("Sensor stream")
+        st.json(sensors.stats(), expanded=False)
+        st.download_button("Prometheus metrics", recorder.prometheus(), "metrics.prom",
+                           mime="text/plain")
+        st.download_button("Samples (JSON lines)", recorder.jsonl(), "latency.jsonl",
+                           mime="application/x-ndjson")
+        if st.button("Profile next rerun"):
+            st.session_state.profile_next_rerun = True
+            st.rerun()
+        if "profile_report" in st.session_state:
+            st.code(st.session_state.profile_report, language=None)
\ No newline at end of file
@@ -0,0 +1,9 @@
+"""Benchmarks for the ingest -> feature -> train -> predict -> render path.
+
+    python -m benchmarks.synthetic --rows 1000000 --out .cache/bench
+    python -m benchmarks.run --rows 15000 100000 1000000
+    python -m benchmarks.run --compare OLD.json NEW.json
+
+Results are written as JSON under .cache/benchmarks/ (one file per run) so
+runs from different commits can be compared.
+"""
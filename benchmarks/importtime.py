@@ -0,0 +1,114 @@
+"""Import-time report for app.py's cold start.
+
+    python -m benchmarks.importtime [--top 20] [--out report.json]
+
+Runs a fresh interpreter with ``-X importtime`` that imports exactly what
+app.py imports at module level (the cost every new worker pays before the
+first paint), then a second one that also imports the modules app.py defers
+with lazy_import, to show what the deferral saves.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from modules.data import ROOT
+
+APP_PATH = os.path.join(ROOT, "app.py")
+
+
+def app_imports(path=APP_PATH):
+    """(module-level imports, lazily imported modules) of the given script."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    eager, deferred = [], []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            eager.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            eager.append(node.module)
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and getattr(node.func, "id", None) == "lazy_import"
+                and node.args and isinstance(node.args[0], ast.Constant)):
+            deferred.append(node.args[0].value)
+    return list(dict.fromkeys(eager)), list(dict.fromkeys(deferred))
+
+
+def parse_importtime(stderr):
+    """Rows of (module, self_us, cumulative_us, depth) from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure(modules):
+    code = "; ".join(f"import {name}" for name in modules)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    rows = parse_importtime(proc.stderr)
+    # Top-level entries (depth 0 relative to the shallowest) add up to the total
+    top_depth = min(r[3] for r in rows) if rows else 0
+    total_us = sum(r[2] for r in rows if r[3] == top_depth)
+    return {"modules": modules, "wall_seconds": wall, "import_seconds": total_us / 1e6,
+            "rows": rows}
+
+
+def report(top=20):
+    eager, deferred = app_imports()
+    startup = measure(eager)
+    full = measure(eager + deferred)
+    by_package = {}
+    for name, self_us, _, _ in startup["rows"]:
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "eager_modules": eager,
+        "deferred_modules": deferred,
+        "startup_import_seconds": startup["import_seconds"],
+        "startup_wall_seconds": startup["wall_seconds"],
+        "with_deferred_import_seconds": full["import_seconds"],
+        "deferred_savings_seconds": full["import_seconds"] - startup["import_seconds"],
+        "top_packages": sorted(([p, us / 1e6] for p, us in by_package.items()),
+                               key=lambda item: -item[1])[:top],
+        "top_modules": [[name, self_us / 1e6] for name, self_us, _, _ in
+                        sorted(startup["rows"], key=lambda r: -r[1])[:top]],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure app.py's import-time cost")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    result = report(args.top)
+    print(f"app.py module-level imports: {', '.join(result['eager_modules'])}")
+    print(f"deferred with lazy_import:   {', '.join(result['deferred_modules']) or '-'}")
+    print(f"startup imports:   {result['startup_import_seconds']:.3f}s "
+          f"(interpreter wall {result['startup_wall_seconds']:.3f}s)")
+    print(f"with deferred:     {result['with_deferred_import_seconds']:.3f}s "
+          f"(saved at startup: {result['deferred_savings_seconds']:.3f}s)")
+    print("\nself time by top-level package:")
+    for package, seconds in result["top_packages"]:
+        print(f"  {seconds * 1000:9.1f} ms  {package}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Time each stage of the pipeline and write the results as JSON.
+
+Every stage is run ``repeat`` times after a warm-up call and summarised as
+min/mean/p50/p99/max seconds. Data stages run once per requested row count
+(the 15k-row source files, or synthetic copies from benchmarks.synthetic);
+the dashboard stage runs app.py headless through Streamlit's AppTest.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmarks.synthetic import generate
+from modules.data import CACHE_DIR, CALORIES_CSV, EXERCISE_CSV, ROOT, load_dataset
+from modules.features import build_features
+from modules.ml_models import TARGET, make_estimator, train_model
+
+RESULTS_DIR = os.path.join(CACHE_DIR, "benchmarks")
+BASE_ROWS = 15_000
+STAGES = ["load_csv", "load_cache", "features", "fit_linear", "fit_forest",
+          "predict_single", "predict_batch", "sensor_ingest", "app"]
+
+
+def measure(fn, repeat=5, warmup=1):
+    """Wall-clock seconds of repeat calls to fn, after warmup untimed calls."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings):
+    t = np.asarray(timings, dtype=float)
+    return {
+        "min": float(t.min()),
+        "mean": float(t.mean()),
+        "p50": float(np.percentile(t, 50)),
+        "p99": float(np.percentile(t, 99)),
+        "max": float(t.max()),
+    }
+
+
+def _result(stage, rows, timings, **extra):
+    result = {"stage": stage, "rows": rows, "repeat": len(timings), "seconds": summarize(timings)}
+    if rows:
+        result["rows_per_second"] = rows / result["seconds"]["p50"]
+    result.update(extra)
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def data_stages(paths, stages, repeat, fit_max_rows, model):
+    """Benchmarks that depend on the dataset size."""
+    exercise_path, calories_path = paths
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        df, _ = load_dataset(exercise_path, calories_path, cache_dir=cache_dir)
+        n = len(df)
+        if "load_csv" in stages:
+            results.append(_result("load_csv", n, measure(
+                lambda: load_dataset(exercise_path, calories_path, use_cache=False), repeat)))
+        if "load_cache" in stages:
+            results.append(_result("load_cache", n, measure(
+                lambda: load_dataset(exercise_path, calories_path, cache_dir=cache_dir), repeat)))
+
+    if "features" in stages:
+        results.append(_result("features", n, measure(lambda: build_features(df), repeat)))
+    X = build_features(df)
+    y = df[TARGET].to_numpy(dtype=float)
+
+    for kind in ("linear", "forest"):
+        if f"fit_{kind}" not in stages:
+            continue
+        rows = n if kind == "linear" else min(n, fit_max_rows)
+        # Forest fits dominate the run; fewer repeats keep large sizes usable
+        timings = measure(lambda: make_estimator(kind).fit(X[:rows], y[:rows]),
+                          repeat if kind == "linear" else max(1, repeat // 2), warmup=0)
+        results.append(_result(f"fit_{kind}", rows, timings))
+
+    if "predict_batch" in stages:
+        results.append(_result("predict_batch", n, measure(lambda: model.predict(X), repeat),
+                               model_version=model.version))
+    return results
+
+
+def predict_single(model, calls=2000):
+    rows = [(30, 70.0, 175.0, 30.0, 120.0, "Male"), (55, 90.0, 182.0, 12.0, 98.0, "Female")]
+    for i in range(50):
+        model.predict_one(*rows[i % 2])
+    timings = []
+    for i in range(calls):
+        start = time.perf_counter()
+        model.predict_one(*rows[i % 2])
+        timings.append(time.perf_counter() - start)
+    return _result("predict_single", 1, timings, model_version=model.version)
+
+
+def sensor_ingest(repeat, users=1000, seconds=60):
+    """One minute of 1 Hz samples from users wearables, ingested a tick at a time."""
+    from itertools import islice
+
+    from modules.sensors import SensorHub, replay
+
+    ticks = list(islice(replay(users=users, start=time.time() - seconds), seconds))
+
+    def ingest():
+        hub = SensorHub()
+        for tick in ticks:
+            hub.ingest(tick)
+
+    return _result("sensor_ingest", users * seconds, measure(ingest, repeat), users=users)
+
+
+def app_render(reruns=5):
+    """First script run and widget-triggered reruns of app.py under AppTest."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=300)
+    start = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"app.py raised: {app.exception[0].message}")
+    timings = []
+    for i in range(reruns):
+        start = time.perf_counter()
+        app.slider[0].set_value(30 + i).run()
+        timings.append(time.perf_counter() - start)
+    return _result("app", 0, timings, first_run_seconds=first)
+
+
+def run(row_counts, stages=STAGES, repeat=5, fit_max_rows=200_000, verbose=True):
+    results = []
+    model = None
+    if {"predict_single", "predict_batch"} & set(stages):
+        model = train_model("forest")
+        model.version = model.version or "benchmark-forest"
+    if "predict_single" in stages:
+        results.append(predict_single(model))
+    for n_rows in row_counts:
+        paths = (EXERCISE_CSV, CALORIES_CSV) if n_rows == BASE_ROWS else generate(n_rows)
+        results.extend(data_stages(paths, stages, repeat, fit_max_rows, model))
+        if verbose:
+            print(f"finished {n_rows} rows", file=sys.stderr)
+    if "sensor_ingest" in stages:
+        results.append(sensor_ingest(repeat))
+    if "app" in stages:
+        results.append(app_render())
+    return {"meta": metadata(), "results": results}
+
+
+def format_results(report):
+    rows = []
+    for r in report["results"]:
+        s = r["seconds"]
+        rows.append({"stage": r["stage"], "rows": r["rows"], "p50_ms": s["p50"] * 1000,
+                     "p99_ms": s["p99"] * 1000, "rows_per_s": r.get("rows_per_second")})
+    return pd.DataFrame(rows).round(3).to_string(index=False)
+
+
+def compare(old, new):
+    """Per (stage, rows) p50 of two result files and the new/old ratio."""
+    def frame(report):
+        return pd.DataFrame([{"stage": r["stage"], "rows": r["rows"], "p50": r["seconds"]["p50"]}
+                             for r in report["results"]]).set_index(["stage", "rows"])
+    table = frame(old).join(frame(new), lsuffix="_old", rsuffix="_new", how="outer")
+    table["ratio"] = table["p50_new"] / table["p50_old"]
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the fitness pipeline")
+    parser.add_argument("--rows", type=int, nargs="+", default=[BASE_ROWS],
+                        help="dataset sizes; anything but 15000 is generated synthetically")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fit-max-rows", type=int, default=200_000,
+                        help="cap on rows used for the forest fit")
+    parser.add_argument("--out", help="result JSON path (default: .cache/benchmarks/<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="print p50 ratios between two result files and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path) as f:
+                reports.append(json.load(f))
+        print(compare(*reports).round(4).to_string())
+        return
+
+    report = run(args.rows, args.stages, args.repeat, args.fit_max_rows)
+    print(format_results(report))
+    out = args.out
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        out = os.path.join(RESULTS_DIR, f"{stamp}-{report['meta']['commit'] or 'local'}.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Scale exercise.csv/calories.csv up to arbitrary row counts.
+
+Rows are bootstrapped from the real tables with a little noise on every
+measurement, so value distributions (and hence model fit/predict costs)
+stay realistic while User_IDs remain unique and the join stays one-to-one.
+"""
+import argparse
+import os
+
+import numpy as np
+
+from modules.data import CALORIES_CSV, CACHE_DIR, EXERCISE_CSV, join_tables, read_calories, read_exercise
+
+BENCH_DATA_DIR = os.path.join(CACHE_DIR, "bench")
+FIRST_USER_ID = 20_000_000
+CHUNK_ROWS = 250_000
+
+# (column, noise std, lower bound, upper bound, decimals)
+JITTER = [
+    ("Age", 1.0, 20, 79, 0),
+    ("Height", 1.0, 120, 230, 1),
+    ("Weight", 1.0, 35, 140, 1),
+    ("Duration", 1.0, 1, 30, 1),
+    ("Heart_Rate", 1.0, 60, 130, 1),
+    ("Body_Temp", 0.1, 37, 41.5, 1),
+    ("Calories", 2.0, 1, 320, 1),
+]
+
+
+def synthetic_paths(n_rows, out_dir=BENCH_DATA_DIR):
+    return (os.path.join(out_dir, f"exercise-{n_rows}.csv"),
+            os.path.join(out_dir, f"calories-{n_rows}.csv"))
+
+
+def _sample(base, n_rows, first_id, rng):
+    frame = base.iloc[rng.integers(0, len(base), n_rows)].reset_index(drop=True)
+    frame["User_ID"] = np.arange(first_id, first_id + n_rows, dtype=np.int64)
+    for column, std, low, high, decimals in JITTER:
+        values = frame[column].to_numpy(dtype=float) + rng.normal(0, std, n_rows)
+        frame[column] = np.round(np.clip(values, low, high), decimals)
+    frame["Age"] = frame["Age"].astype(np.int32)
+    return frame
+
+
+def generate(n_rows, out_dir=BENCH_DATA_DIR, seed=0, exercise_path=EXERCISE_CSV,
+             calories_path=CALORIES_CSV, overwrite=False):
+    """Write n_rows-row exercise/calories CSVs and return their paths.
+
+    Existing files for the same n_rows are reused unless overwrite is set.
+    """
+    paths = synthetic_paths(n_rows, out_dir)
+    if not overwrite and all(os.path.exists(p) for p in paths):
+        return paths
+    os.makedirs(out_dir, exist_ok=True)
+    base = join_tables(read_exercise(exercise_path), read_calories(calories_path))
+    exercise_columns = [c for c in base.columns if c != "Calories"]
+    rng = np.random.default_rng(seed)
+    tmp = [p + ".tmp" for p in paths]
+    written = 0
+    while written < n_rows:
+        size = min(CHUNK_ROWS, n_rows - written)
+        chunk = _sample(base, size, FIRST_USER_ID + written, rng)
+        header = written == 0
+        mode = "w" if header else "a"
+        chunk[exercise_columns].to_csv(tmp[0], mode=mode, header=header, index=False)
+        chunk[["User_ID", "Calories"]].to_csv(tmp[1], mode=mode, header=header, index=False)
+        written += size
+    for src, dst in zip(tmp, paths):
+        os.replace(src, dst)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate scaled-up benchmark datasets")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--out", default=BENCH_DATA_DIR)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args(argv)
+    for n_rows in args.rows:
+        exercise, calories = generate(n_rows, args.out, args.seed, overwrite=args.overwrite)
+        print(f"{n_rows} rows: {exercise}, {calories}")
+
+
+if __name__ == "__main__":
+    main()
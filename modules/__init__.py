@@ -0,0 +1 @@
+"""Application modules for FitMetrics Pro (data, models, analytics)."""
@@ -0,0 +1,239 @@
+"""Page styling payloads, built once per server process.
+
+Streamlit re-executes app.py on every widget change, so the global CSS block
+and the base64 background image used to be rebuilt and re-sent on each
+rerun for each session. These helpers memoize the finished strings; the
+background is keyed on the image file's mtime and size so replacing bg.jpg
+takes effect without a restart. The image can also be shrunk to a byte
+budget (requires Pillow) or served by Streamlit's static file server so the
+CSS only carries a short URL.
+"""
+import base64
+import io
+import mimetypes
+import os
+from functools import lru_cache
+
+from modules.data import ROOT
+
+STATIC_DIR = os.path.join(ROOT, "static")
+LOGO_PATH = os.path.join(ROOT, "assets", "images", "logo.svg")
+STATIC_URL = "app/static"
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; images are then used as-is
+    Image = None
+
+
+def _file_key(path):
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+def shrink_image(data, max_bytes, max_width=1920):
+    """Downscale/recompress JPEG-able image bytes until they fit max_bytes.
+
+    Returns the original bytes when they already fit or Pillow is missing.
+    """
+    if len(data) <= max_bytes or Image is None:
+        return data
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    if image.width > max_width:
+        image = image.resize((max_width, round(image.height * max_width / image.width)))
+    best = data
+    for quality in (85, 75, 65, 50, 35):
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+        best = min(best, buffer.getvalue(), key=len)
+        if len(best) <= max_bytes:
+            break
+        if quality == 50 and image.width > 640:
+            image = image.resize((image.width // 2, image.height // 2))
+    return best
+
+
+@lru_cache(maxsize=8)
+def _background_css(key, max_bytes, static):
+    path = key[0]
+    with open(path, "rb") as image:
+        data = image.read()
+    mime = mimetypes.guess_type(path)[0] or "image/jpeg"
+    if max_bytes:
+        shrunk = shrink_image(data, max_bytes)
+        if shrunk is not data:
+            data, mime = shrunk, "image/jpeg"
+
+    if static:
+        name, ext = os.path.splitext(os.path.basename(path))
+        ext = ".jpg" if mime == "image/jpeg" else ext
+        served = f"{name}-{key[1]:x}{ext}"
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        for old in os.listdir(STATIC_DIR):
+            if old.startswith(f"{name}-"):
+                os.remove(os.path.join(STATIC_DIR, old))
+        with open(os.path.join(STATIC_DIR, served), "wb") as f:
+            f.write(data)
+        url = f"{STATIC_URL}/{served}"
+    else:
+        url = f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+    return f"""
+        <style>
+        .stApp {{
+            background-image: url("{url}");
+            background-size: cover;
+            background-position: center;
+            background-attachment: fixed;
+            background-color: rgba(14, 17, 23, 0.95);
+            background-blend-mode: overlay;
+        }}
+        </style>
+        """
+
+
+def background_css(image_file, max_bytes=None, static=False):
+    """<style> block setting image_file as the page background.
+
+    static=True copies the image under static/ and links to it, which needs
+    ``enableStaticServing = true`` in .streamlit/config.toml.
+    """
+    return _background_css(_file_key(image_file), max_bytes, static)
+
+
+@lru_cache(maxsize=4)
+def app_css(primary_color, secondary_color, card_color):
+    return f"""
+    <style>
+    :root {{
+        --primary: {primary_color};
+        --secondary: {secondary_color};
+    }}
+
+    .main {{
+        background-color: transparent;
+        color: white;
+    }}
+
+    .stButton>button {{
+        background-color: var(--primary) !important;
+        border-radius: 10px !important;
+        padding: 10px 24px !important;
+        font-weight: bold !important;
+        transition: all 0.3s ease !important;
+    }}
+
+    .stButton>button:hover {{
+        transform: scale(1.05) !important;
+        box-shadow: 0 5px 15px rgba(255, 75, 75, 0.4) !important;
+    }}
+
+    .stSlider .st-c7 {{
+        background-color: var(--primary) !important;
+    }}
+
+    .stRadio [role=radiogroup] label [data-testid=stMarkdownContainer] p {{
+        font-size: 16px !important;
+    }}
+
+    .card {{
+        background: linear-gradient(135deg, {card_color}, #1a3a5f);
+        border-radius: 15px;
+        padding: 20px;
+        box-shadow: 0 8px 32px rgba(0,0,0,0.3);
+        margin-bottom: 20px;
+        border: 1px solid rgba(255,255,255,0.1);
+        backdrop-filter: blur(10px);
+    }}
+
+    .metric-value {{
+        font-size: 2.5rem !important;
+        font-weight: 700 !important;
+        color: var(--primary) !important;
+        text-shadow: 0 2px 10px rgba(255, 75, 75, 0.3);
+    }}
+
+    .progress-container {{
+        height: 8px;
+        background: #2c3e50;
+        border-radius: 4px;
+        margin: 10px 0;
+    }}
+
+    .progress-bar {{
+        height: 100%;
+        background: linear-gradient(90deg, var(--primary), var(--secondary));
+        border-radius: 4px;
+        transition: width 0.5s ease;
+    }}
+
+    .feature-card {{
+        transition: transform 0.3s;
+        border-radius: 10px;
+        overflow: hidden;
+        background: {card_color};
+        padding: 15px;
+        margin-bottom: 10px;
+    }}
+
+    .feature-card:hover {{
+        transform: translateY(-5px);
+        box-shadow: 0 10px 25px rgba(0,0,0,0.3);
+    }}
+
+    .achievement-badge {{
+        background: linear-gradient(45deg, #FFD700, #FFA500);
+        border-radius: 50%;
+        width: 60px;
+        height: 60px;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        margin: 0 auto;
+        font-size: 24px;
+        box-shadow: 0 4px 15px rgba(255, 215, 0, 0.3);
+    }}
+
+    .pulse-animation {{
+        animation: pulse 2s infinite;
+    }}
+
+    @keyframes pulse {{
+        0% {{ transform: scale(1); }}
+        50% {{ transform: scale(1.05); }}
+        100% {{ transform: scale(1); }}
+    }}
+
+    footer {{
+        text-align: center;
+        padding: 20px;
+        margin-top: 40px;
+        color: #aaa;
+    }}
+
+    /* New styles for enhanced features */
+    .workout-card {{
+        background: linear-gradient(135deg, {primary_color}20, {secondary_color}20);
+        border-radius: 10px;
+        padding: 15px;
+        margin: 10px 0;
+        border-left: 4px solid var(--primary);
+    }}
+
+    .nutrition-card {{
+        background: linear-gradient(135deg, #4CAF5020, #2196F320);
+        border-radius: 10px;
+        padding: 15px;
+        margin: 10px 0;
+        border-left: 4px solid #4CAF50;
+    }}
+
+    .challenge-card {{
+        background: linear-gradient(135deg, #9C27B020, #E91E6320);
+        border-radius: 10px;
+        padding: 15px;
+        margin: 10px 0;
+        border-left: 4px solid #9C27B0;
+    }}
+    </style>
+"""
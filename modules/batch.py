@@ -0,0 +1,118 @@
+"""Batch calorie scoring for whole cohorts.
+
+    python -m modules.batch cohort.csv -o predictions.csv --workers 4
+
+Reads a file in the exercise.csv schema in fixed-size batches, builds the
+features with the same vectorized code as training, scores the batches
+across a process pool and writes ``User_ID,Calories`` like calories.csv.
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from modules.ml_models import TARGET, latest_model_path, load_model
+from modules.streaming import iter_feature_batches
+from modules.validation import MAX_BAD_FRACTION
+
+DEFAULT_BATCH_SIZE = 50_000
+
+_worker_model = None
+
+
+@dataclass
+class ScoreReport:
+    rows: int
+    batches: int
+    seconds: float
+    model_version: str
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else float("inf")
+
+
+def _init_worker(model_path):
+    global _worker_model
+    _worker_model = load_model(model_path, mmap_mode="r")
+
+
+def _predict_batch(X):
+    return np.round(_worker_model.predict(X), 1)
+
+
+def score_file(input_path, output_path, model_path=None, batch_size=DEFAULT_BATCH_SIZE,
+               workers=None, max_bad_fraction=MAX_BAD_FRACTION):
+    """Score input_path into output_path and return a ScoreReport.
+
+    At most 2 * workers batches are in flight, so memory stays bounded by the
+    batch size however large the input is. workers=1 scores in-process.
+    """
+    model_path = model_path or latest_model_path()
+    if model_path is None:
+        raise FileNotFoundError("No trained model found; run `python -m modules.train`")
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    rows = batches = 0
+    # Streaming without calories: duplicates and repeat sessions are scored,
+    # only invalid rows are quarantined
+    feature_batches = iter_feature_batches(input_path, calories=None, chunksize=batch_size,
+                                           dedupe=False, max_bad_fraction=max_bad_fraction)
+
+    with open(output_path, "w", newline="") as out:
+        out.write(f"User_ID,{TARGET}\n")
+
+        def write(user_ids, predictions):
+            pd.DataFrame({"User_ID": user_ids, TARGET: predictions}).to_csv(
+                out, header=False, index=False)
+
+        if workers == 1:
+            model = load_model(model_path, mmap_mode="r")
+            version = model.version
+            for batch in feature_batches:
+                write(batch.user_ids, np.round(model.predict(batch.X), 1))
+                rows += len(batch)
+                batches += 1
+        else:
+            version = os.path.basename(os.path.normpath(model_path))
+            pending = deque()
+            with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                     initargs=(model_path,)) as pool:
+                for batch in feature_batches:
+                    pending.append((batch.user_ids, pool.submit(_predict_batch, batch.X)))
+                    if len(pending) >= 2 * workers:
+                        user_ids, future = pending.popleft()
+                        write(user_ids, future.result())
+                    rows += len(batch)
+                    batches += 1
+                while pending:
+                    user_ids, future = pending.popleft()
+                    write(user_ids, future.result())
+
+    return ScoreReport(rows, batches, time.perf_counter() - start, version)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-score calories for an exercise.csv file")
+    parser.add_argument("input", help="CSV in the exercise.csv schema")
+    parser.add_argument("-o", "--output", default="predictions.csv")
+    parser.add_argument("--model", help="artifact directory (default: models/LATEST)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, help="process pool size (default: all cores)")
+    parser.add_argument("--max-bad-fraction", type=float, default=MAX_BAD_FRACTION,
+                        help="abort when more of the rows than this fail validation")
+    args = parser.parse_args(argv)
+
+    report = score_file(args.input, args.output, args.model, args.batch_size, args.workers,
+                        args.max_bad_fraction)
+    print(f"Scored {report.rows:,} rows in {report.batches} batches with {report.model_version} "
+          f"in {report.seconds:.2f}s ({report.rows_per_second:,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Plotly figure building with a shared dark theme and an LRU figure cache.
+
+Every chart in app.py goes through ``cached_figure``: the go.Figure is built
+once per distinct (chart, data hash, options) and reused until evicted.
+What is cached is the figure object, not its JSON; st.plotly_chart still
+serializes it on each render, so the saving is the DataFrame work and
+plotly's figure construction, and the payload is kept small instead. A
+small registered template replaces the per-figure update_layout calls, which
+also keeps plotly's default template (several kB) out of every payload.
+Numeric series are handed to plotly as NumPy arrays so they serialize as
+base64 typed arrays, and line series longer than ``MAX_POINTS`` are
+downsampled with LTTB before they reach the browser.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from modules.profiling import timed
+
+TEMPLATE_NAME = "fitmetrics_dark"
+pio.templates[TEMPLATE_NAME] = go.layout.Template(layout=dict(
+    plot_bgcolor="rgba(0,0,0,0)",
+    paper_bgcolor="rgba(0,0,0,0)",
+    font=dict(color="white"),
+))
+
+# Roughly one point per horizontal pixel of a dashboard-width chart
+MAX_POINTS = 1000
+
+
+def lttb(x, y, n_out):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last point and, from each of n_out - 2 equal-width
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the next bucket's centroid.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def data_hash(df):
+    digest = hashlib.sha1()
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """Thread-safe LRU of built figures, shared by every session."""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return self._figures[key]
+            self.misses += 1
+        figure = build()
+        with self._lock:
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+        return figure
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._figures), "hits": self.hits, "misses": self.misses}
+
+
+figure_cache = FigureCache()
+
+
+def cached_figure(kind, df, build, **options):
+    with timed(f"chart.{kind}"):
+        key = (kind, data_hash(df), tuple(sorted((k, repr(v)) for k, v in options.items())))
+        return figure_cache.get_or_build(key, lambda: build(df, **options))
+
+
+def _numeric_x(values):
+    """Datetime x values as epoch milliseconds so they ship as a typed array."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype="datetime64[ms]").astype(np.int64).astype(float), "date"
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float), None
+    return values.to_numpy(), None
+
+
+def _line(df, x, y, title, max_points):
+    xs, axis_type = _numeric_x(df[x])
+    figure = go.Figure()
+    for column in [y] if isinstance(y, str) else y:
+        ys = df[column].to_numpy(dtype=float)
+        trace_x = xs
+        if len(ys) > max_points and xs.dtype.kind == "f":
+            keep = lttb(xs, ys, max_points)
+            trace_x, ys = xs[keep], ys[keep]
+        figure.add_trace(go.Scatter(x=trace_x, y=ys, name=column,
+                                    mode="lines+markers" if len(ys) <= 60 else "lines"))
+    figure.update_layout(template=TEMPLATE_NAME, title=title, xaxis_title=x,
+                         yaxis_title=y if isinstance(y, str) else "value",
+                         showlegend=not isinstance(y, str))
+    if axis_type:
+        figure.update_xaxes(type=axis_type)
+    return figure
+
+
+def _bar(df, x, y, title):
+    return px.bar(df, x=x, y=y, barmode="group", title=title, template=TEMPLATE_NAME)
+
+
+def _scatter(df, x, y, size, color, title):
+    return px.scatter(df, x=x, y=y, size=size, color=color, title=title, template=TEMPLATE_NAME)
+
+
+def line_chart(df, x, y, title, max_points=MAX_POINTS):
+    return cached_figure("line", df, _line, x=x, y=y, title=title, max_points=max_points)
+
+
+def bar_chart(df, x, y, title):
+    return cached_figure("bar", df, _bar, x=x, y=y, title=title)
+
+
+def scatter_chart(df, x, y, size, color, title):
+    return cached_figure("scatter", df, _scatter, x=x, y=y, size=size, color=color, title=title)
+
+
+def completion_chart(days, completion, color):
+    df = pd.DataFrame({"Day": days, "Completion %": np.asarray(completion, dtype=float)})
+
+    def build(df, color):
+        figure = go.Figure(data=[go.Bar(name="Completion %", x=df["Day"].to_numpy(),
+                                        y=df["Completion %"].to_numpy(), marker_color=color)])
+        figure.update_layout(template=TEMPLATE_NAME, title="Weekly Workout Completion")
+        return figure
+
+    return cached_figure("completion", df, build, color=color)
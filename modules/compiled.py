@@ -0,0 +1,263 @@
+"""Flat NumPy export of the calorie model for low-latency inference.
+
+    python -m modules.compiled            # parity check + latency comparison
+    python -m modules.compiled --export   # (re)write compiled.npz for LATEST
+
+A fitted RandomForestRegressor is flattened into one set of node arrays for
+all trees (feature, threshold, children, value) and evaluated by walking
+every tree at once, a handful of NumPy gathers per level. Leaves point back
+at themselves, so the walk needs no per-tree bookkeeping and stops soon
+after every tree has reached a leaf. A LinearRegression becomes its
+coefficient vector. save_model writes the export next to model.joblib as
+compiled.npz and CalorieModel uses it for small batches. The npz is stored
+uncompressed so load_compiled can memory-map its arrays.
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+import zipfile
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import train_test_split
+
+COMPILED_FILE = "compiled.npz"
+
+
+class CompiledForest:
+    kind = "forest"
+
+    def __init__(self, feature, threshold, first_child, value, roots, depth):
+        self.feature = np.asarray(feature, dtype=np.intp)  # 0 on leaves
+        self.threshold = np.asarray(threshold, dtype=np.float64)  # +inf on leaves
+        # Children of a node are stored next to each other, so the next node
+        # is first_child + (x > threshold); leaves point at themselves.
+        self.first_child = np.asarray(first_child, dtype=np.intp)
+        self.value = np.asarray(value, dtype=np.float64)  # leaf values (tree means)
+        self.roots = np.asarray(roots, dtype=np.intp)  # each tree's root node
+        self.depth = int(depth)
+        self.is_leaf = np.isinf(self.threshold)
+
+    @classmethod
+    def from_estimator(cls, forest):
+        features, thresholds, first_children, values, roots = [], [], [], [], []
+        offset = depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            left, right = tree.children_left, tree.children_right
+            leaf = left < 0
+            # Breadth-first renumbering puts every (left, right) pair side by side
+            levels = [np.array([0])]
+            while True:
+                internal = levels[-1][~leaf[levels[-1]]]
+                if not internal.size:
+                    break
+                levels.append(np.column_stack([left[internal], right[internal]]).ravel())
+            depth = max(depth, len(levels) - 1)
+            order = np.concatenate(levels)
+            n = len(order)
+            new_index = np.empty(n, dtype=np.int64)
+            new_index[order] = np.arange(n)
+            leaf = leaf[order]
+            first_children.append(offset + np.where(leaf, np.arange(n),
+                                                    new_index[np.where(leaf, 0, left[order])]))
+            features.append(np.where(leaf, 0, tree.feature[order]))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold[order]))
+            values.append(tree.value.reshape(n)[order])
+            roots.append(offset)
+            offset += n
+        return cls(np.concatenate(features), np.concatenate(thresholds),
+                   np.concatenate(first_children), np.concatenate(values), roots, depth)
+
+    def _predict_row(self, x):
+        nodes = self.roots
+        for level in range(self.depth):
+            nodes = self.first_child.take(nodes) + (
+                x.take(self.feature.take(nodes)) > self.threshold.take(nodes))
+            # Most paths are far shorter than the deepest one
+            if level % 4 == 3 and self.is_leaf.take(nodes).all():
+                break
+        return self.value.take(nodes).mean()
+
+    def predict(self, X):
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1 or len(X) == 1:
+            return np.array([self._predict_row(X.ravel())])
+        n_features = X.shape[1]
+        offsets = (np.arange(len(X)) * n_features)[:, None]
+        flat = X.ravel()
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for level in range(self.depth):
+            nodes = self.first_child.take(nodes) + (
+                flat.take(offsets + self.feature.take(nodes)) > self.threshold.take(nodes))
+            if level % 4 == 3 and self.is_leaf.take(nodes).all():
+                break
+        return self.value.take(nodes).mean(axis=1)
+
+    def arrays(self):
+        # Stored as intp so a memory-mapped load needs no converted copy
+        return {"feature": self.feature, "threshold": self.threshold,
+                "first_child": self.first_child, "value": self.value,
+                "roots": self.roots, "depth": np.asarray(self.depth)}
+
+
+class CompiledLinear:
+    kind = "linear"
+
+    def __init__(self, coef, intercept):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+
+    @classmethod
+    def from_estimator(cls, linear):
+        return cls(linear.coef_, linear.intercept_)
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def arrays(self):
+        return {"coef": self.coef, "intercept": np.asarray(self.intercept)}
+
+
+def compile_estimator(estimator):
+    if isinstance(estimator, RandomForestRegressor):
+        return CompiledForest.from_estimator(estimator)
+    if isinstance(estimator, LinearRegression):
+        return CompiledLinear.from_estimator(estimator)
+    raise TypeError(f"Cannot compile {type(estimator).__name__}")
+
+
+def save_compiled(compiled, path):
+    """Write compiled.npz (uncompressed) into the artifact directory path."""
+    target = os.path.join(path, COMPILED_FILE)
+    with open(target + ".tmp", "wb") as f:
+        np.savez(f, kind=np.asarray(compiled.kind), **compiled.arrays())
+    os.replace(target + ".tmp", target)
+    return target
+
+
+def _map_npz(target, mode="r"):
+    """{name: np.memmap} for every array in an uncompressed npz, else None.
+
+    np.load ignores mmap_mode for npz archives, so each member's .npy header
+    is parsed here and its data mapped straight from the archive.
+    """
+    arrays = {}
+    with zipfile.ZipFile(target) as archive, open(target, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                return None
+            # Member data follows its local header: 30 bytes, then name and extra field
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                return None
+            arrays[info.filename.removesuffix(".npy")] = np.memmap(
+                target, dtype=dtype, mode=mode, offset=f.tell(), shape=shape,
+                order="F" if fortran else "C")
+    return arrays
+
+
+def load_compiled(path, mmap_mode=None):
+    """The compiled model stored in an artifact directory, or None if absent.
+
+    With mmap_mode="r" the arrays are mapped read-only from compiled.npz, so
+    processes serving the same version share them through the page cache.
+    """
+    target = os.path.join(path, COMPILED_FILE)
+    if not os.path.exists(target):
+        return None
+    data = _map_npz(target, mmap_mode) if mmap_mode else None
+    if data is None:
+        with np.load(target) as npz:
+            data = dict(npz)
+    if str(data["kind"]) == "forest":
+        return CompiledForest(data["feature"], data["threshold"], data["first_child"],
+                              data["value"], data["roots"], data["depth"])
+    return CompiledLinear(data["coef"], data["intercept"])
+
+
+def _per_call_us(fn, X, repeats):
+    fn(X)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def _per_tree_predict(forest):
+    def predict(X):
+        X32 = X.astype(np.float32)
+        return sum(tree.tree_.predict(X32).ravel() for tree in forest.estimators_) / len(
+            forest.estimators_)
+    return predict
+
+
+def compare(model, X_test, y_test, repeats=500):
+    """Parity and single-row latency of the compiled model against sklearn.
+
+    model is a CalorieModel; X_test is the unscaled feature matrix.
+    """
+    compiled = compile_estimator(model.estimator)
+    X = X_test
+    if model.scaler is not None:
+        X = (X - model.scaler.mean_) / model.scaler.scale_
+    expected = model.estimator.predict(X)
+    got = compiled.predict(X)
+    row = X[:1]
+    return {
+        "kind": compiled.kind,
+        "rows": len(X),
+        "max_abs_diff": float(np.max(np.abs(expected - got))),
+        "rmse_sklearn": float(np.sqrt(np.mean((expected - y_test) ** 2))),
+        "rmse_compiled": float(np.sqrt(np.mean((got - y_test) ** 2))),
+        "sklearn_predict_us": _per_call_us(model.estimator.predict, row, repeats // 5),
+        **({"per_tree_predict_us": _per_call_us(_per_tree_predict(model.estimator), row, repeats)}
+           if compiled.kind == "forest" else {}),
+        "compiled_predict_us": _per_call_us(compiled.predict, row, repeats),
+        "compiled_batch_us_per_row": _per_call_us(compiled.predict, X, 3) / len(X),
+    }
+
+
+def main(argv=None):
+    from modules.features import build_features
+    from modules.ml_models import TARGET, latest_model_path, load_model, load_training_frame
+
+    parser = argparse.ArgumentParser(description="Export and check the compiled calorie model")
+    parser.add_argument("--model", help="artifact directory (default: models/LATEST)")
+    parser.add_argument("--export", action="store_true", help="write compiled.npz and exit")
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    args = parser.parse_args(argv)
+
+    path = args.model or latest_model_path()
+    if path is None:
+        raise SystemExit("No trained model found; run `python -m modules.train`")
+    model = load_model(path)
+    if args.export:
+        print(f"Wrote {save_compiled(compile_estimator(model.estimator), path)}")
+        return
+
+    _, test = train_test_split(load_training_frame(), test_size=0.2, random_state=1)
+    result = compare(model, build_features(test), test[TARGET].to_numpy())
+    for key, value in result.items():
+        print(f"{key:>26}: {value:.6g}" if isinstance(value, float) else f"{key:>26}: {value}")
+    print(f"{'single-row speedup':>26}: "
+          f"{result['sklearn_predict_us'] / result['compiled_predict_us']:.1f}x")
+    if result["max_abs_diff"] > args.tolerance:
+        print("Parity check FAILED", file=sys.stderr)
+        sys.exit(1)
+    print("Parity check passed")
+
+
+if __name__ == "__main__":
+    main()
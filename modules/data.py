@@ -0,0 +1,161 @@
+"""Loading of the exercise/calories tables with a columnar on-disk cache.
+
+The CSVs are parsed once with compact explicit dtypes, joined on User_ID and
+deduplicated (as in fitness.ipynb), then written to .cache/ as Parquet
+(or .npz when pyarrow is not installed). Later loads read the binary copy
+until either source file changes.
+"""
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, asdict
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXERCISE_CSV = os.path.join(ROOT, "exercise.csv")
+CALORIES_CSV = os.path.join(ROOT, "calories.csv")
+CACHE_DIR = os.path.join(ROOT, ".cache")
+
+EXERCISE_DTYPES = {
+    "User_ID": "int32",
+    "Gender": "category",
+    "Age": "int32",
+    "Height": "float32",
+    "Weight": "float32",
+    "Duration": "float32",
+    "Heart_Rate": "float32",
+    "Body_Temp": "float32",
+}
+CALORIES_DTYPES = {"User_ID": "int32", "Calories": "float32"}
+COLUMNS = list(EXERCISE_DTYPES) + ["Calories"]
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = "parquet"
+except ImportError:
+    CACHE_FORMAT = "npz"
+
+
+@dataclass
+class LoadStats:
+    source: str  # "csv" or "cache"
+    seconds: float
+    memory_bytes: int
+    rows: int
+    cache_path: str = None
+    quality: dict = None  # validation report per table, see modules.validation
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def read_exercise(path=EXERCISE_CSV, **kwargs):
+    return pd.read_csv(path, dtype=EXERCISE_DTYPES, **kwargs)
+
+
+def read_calories(path=CALORIES_CSV, **kwargs):
+    return pd.read_csv(path, dtype=CALORIES_DTYPES, **kwargs)
+
+
+def join_tables(exercise, calories):
+    exercise_df = exercise.merge(calories, on="User_ID")
+    exercise_df.drop_duplicates(inplace=True, ignore_index=True)
+    return exercise_df
+
+
+def source_signature(paths, hash_contents=False):
+    """Identify the current version of the source files.
+
+    Size and mtime are cheap and catch normal re-exports; hash_contents also
+    digests the bytes for sources whose mtime is unreliable (copies, checkouts).
+    """
+    signature = []
+    for path in paths:
+        st = os.stat(path)
+        entry = {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if hash_contents:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            entry["sha256"] = digest.hexdigest()
+        signature.append(entry)
+    return signature
+
+
+def _cache_paths(exercise_path, calories_path, cache_dir):
+    key = hashlib.sha1(
+        f"{os.path.abspath(exercise_path)}|{os.path.abspath(calories_path)}".encode()
+    ).hexdigest()[:12]
+    base = os.path.join(cache_dir, f"exercise_calories-{key}")
+    return f"{base}.{CACHE_FORMAT}", f"{base}.json"
+
+
+def _write_cache(df, path):
+    if CACHE_FORMAT == "parquet":
+        df.to_parquet(path, index=False)
+        return
+    arrays = {col: df[col].to_numpy() for col in df.columns if col != "Gender"}
+    arrays["Gender__codes"] = df["Gender"].cat.codes.to_numpy()
+    arrays["Gender__categories"] = np.asarray(df["Gender"].cat.categories, dtype=str)
+    np.savez(path, **arrays)
+
+
+def _read_cache(path):
+    if CACHE_FORMAT == "parquet":
+        return pd.read_parquet(path)
+    with np.load(path) as arrays:
+        data = {col: arrays[col] for col in arrays.files if not col.startswith("Gender__")}
+        data["Gender"] = pd.Categorical.from_codes(
+            arrays["Gender__codes"], arrays["Gender__categories"]
+        )
+    return pd.DataFrame(data)[COLUMNS]
+
+
+def load_dataset(exercise_path=EXERCISE_CSV, calories_path=CALORIES_CSV,
+                 cache_dir=CACHE_DIR, use_cache=True, hash_contents=False, validate=True,
+                 max_bad_fraction=None):
+    """Return (joined DataFrame, LoadStats), reusing the cache when it is fresh.
+
+    Fresh CSVs go through modules.validation first: failing rows are
+    quarantined and a bad export raises DataQualityError before anything is
+    cached.
+    """
+    start = time.perf_counter()
+    signature = source_signature([exercise_path, calories_path], hash_contents)
+    data_path, meta_path = _cache_paths(exercise_path, calories_path, cache_dir)
+
+    if use_cache and os.path.exists(data_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("signature") == signature and (meta.get("quality") or not validate):
+            df = _read_cache(data_path)
+            return df, LoadStats("cache", time.perf_counter() - start,
+                                 int(df.memory_usage(deep=True).sum()), len(df), data_path,
+                                 meta.get("quality"))
+
+    quality = None
+    if validate:
+        from modules.validation import MAX_BAD_FRACTION, read_validated
+
+        limit = MAX_BAD_FRACTION if max_bad_fraction is None else max_bad_fraction
+        quarantine_dir = os.path.join(cache_dir, "quarantine")
+        exercise, exercise_report = read_validated(exercise_path, "exercise", limit,
+                                                   quarantine_dir)
+        calories, calories_report = read_validated(calories_path, "calories", limit,
+                                                   quarantine_dir)
+        quality = {"exercise": exercise_report.as_dict(), "calories": calories_report.as_dict()}
+    else:
+        exercise, calories = read_exercise(exercise_path), read_calories(calories_path)
+    df = join_tables(exercise, calories)
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_cache(df, data_path)
+        with open(meta_path, "w") as f:
+            json.dump({"signature": signature, "rows": len(df), "quality": quality}, f, indent=2)
+    return df, LoadStats("csv", time.perf_counter() - start,
+                         int(df.memory_usage(deep=True).sum()), len(df),
+                         data_path if use_cache else None, quality)
@@ -0,0 +1,120 @@
+"""Feature engineering shared by fitness.ipynb, the model code and app.py.
+
+Every function works on whole columns (NumPy arrays, pandas Series or plain
+lists) with no per-row Python, so the dashboard scores a single user by
+running the same code on a one-row batch. Categorical bins and one-hot
+categories are fixed here rather than inferred from the data, which keeps
+train, test and live frames on the same column schema.
+"""
+import numpy as np
+import pandas as pd
+
+# Same bins as the notebook's pd.cut calls (left-closed)
+BMI_BINS = [0, 15, 16, 18.5, 25, 30, 35, 40, 50]
+BMI_CATEGORIES = ["Very severely underweight", "Severely underweight", "Underweight",
+                  "Normal", "Overweight", "Obese Class I", "Obese Class II", "Obese Class III"]
+AGE_BINS = [20, 40, 60, 80]
+AGE_GROUPS = ["Young", "Middle-Aged", "Old"]
+
+# One-hot categories per column; the first is dropped like get_dummies(drop_first=True)
+CATEGORIES = {"Gender": ["female", "male"]}
+
+# Body_Temp is left out: the dashboard has no input for it.
+FEATURES = ["Gender_male", "Age", "Height", "Weight", "BMI", "Duration", "Heart_Rate"]
+
+# "Other" sits between the two encoded genders instead of being dropped.
+GENDER_CODES = {"male": 1.0, "female": 0.0, "other": 0.5}
+
+
+def _floats(values):
+    return np.asarray(values, dtype=float)
+
+
+def bmi(weight, height):
+    """Body-mass index from kg and cm, rounded to 2 decimals like the notebook."""
+    return np.round(_floats(weight) / (_floats(height) / 100) ** 2, 2)
+
+
+def _binned(values, bins, labels):
+    values = _floats(values)
+    codes = np.digitize(values, bins) - 1
+    inside = (codes >= 0) & (codes < len(labels))
+    out = np.full(values.shape, None, dtype=object)
+    out[inside] = np.asarray(labels, dtype=object)[codes[inside]]
+    return out
+
+
+def bmi_category(values):
+    """BMI_CATEGORIES label per BMI value; None outside [0, 50)."""
+    return _binned(values, BMI_BINS, BMI_CATEGORIES)
+
+
+def age_group(values):
+    """AGE_GROUPS label per age; None outside [20, 80)."""
+    return _binned(values, AGE_BINS, AGE_GROUPS)
+
+
+def gender_code(values):
+    """GENDER_CODES value per gender string (case-insensitive, unknown -> 0.5)."""
+    # Look up each distinct label once and broadcast through the category codes
+    # (free for the category columns data.py reads)
+    labels = pd.Categorical(values)
+    other = GENDER_CODES["other"]
+    lookup = np.array([GENDER_CODES.get(str(c).lower(), other) for c in labels.categories]
+                      + [other])
+    return lookup[labels.codes]
+
+
+def add_features(df):
+    """Copy of df with the notebook's BMI, categorized_BMI and age_groups columns."""
+    df = df.copy()
+    df["BMI"] = bmi(df["Weight"], df["Height"])
+    df["categorized_BMI"] = bmi_category(df["BMI"])
+    df["age_groups"] = pd.Categorical(age_group(df["Age"]), categories=AGE_GROUPS)
+    return df
+
+
+def one_hot(df, categories=None, drop_first=True):
+    """Replace categorical columns by 0/1 columns for a fixed category list.
+
+    Unlike pd.get_dummies the output columns never depend on which values
+    happen to occur in df; values outside the list get all zeros.
+    """
+    categories = CATEGORIES if categories is None else categories
+    df = df.copy()
+    for column, levels in categories.items():
+        if column not in df:
+            continue
+        values = np.char.lower(np.asarray(df.pop(column), dtype=str))
+        for level in levels[1:] if drop_first else levels:
+            df[f"{column}_{level}"] = (values == level.lower()).astype(np.uint8)
+    return df
+
+
+def schema(categories=None, drop_first=True):
+    """JSON-able description of the encoding, stored next to trained models."""
+    return {
+        "features": FEATURES,
+        "gender_codes": GENDER_CODES,
+        "categories": CATEGORIES if categories is None else categories,
+        "drop_first": drop_first,
+        "bmi_bins": BMI_BINS,
+        "age_bins": AGE_BINS,
+    }
+
+
+def build_features(df):
+    """Return the model matrix (float64, columns in FEATURES order) for df.
+
+    df can be a DataFrame or any mapping of column name to array-like, e.g.
+    a dict of one-element lists for a single dashboard user.
+    """
+    return np.column_stack([
+        gender_code(df["Gender"]),
+        _floats(df["Age"]),
+        _floats(df["Height"]),
+        _floats(df["Weight"]),
+        bmi(df["Weight"], df["Height"]),
+        _floats(df["Duration"]),
+        _floats(df["Heart_Rate"]),
+    ])
@@ -0,0 +1,44 @@
+"""Deferred imports for the dashboard's heavy dependencies.
+
+``lazy_import("modules.charts")`` returns a stand-in module straight away and
+only imports the real one (and so plotly) on the first attribute access.
+app.py uses it for plotting and the model code so the page header and
+profile inputs paint before plotly and scikit-learn are loaded.
+
+importlib's LazyLoader is not thread-safe before Python 3.12: concurrent
+first accesses from Streamlit session threads could see a half-executed
+module. Here the first access imports under a lock and every later one goes
+straight to the real module.
+"""
+import importlib
+import importlib.util
+import threading
+import types
+
+_import_lock = threading.Lock()
+
+
+class _LazyModule(types.ModuleType):
+    def _load(self):
+        module = self.__dict__.get("_module")
+        if module is None:
+            with _import_lock:
+                module = self.__dict__.get("_module")
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self._module = module
+        return module
+
+    def __getattr__(self, attr):
+        # Only called for names missing from the stand-in, i.e. the real module's
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """Return module name, importing it on first attribute access."""
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    return _LazyModule(name)
@@ -0,0 +1,187 @@
+"""Weekly calorie leaderboard with O(log n) rank and top-N queries.
+
+Scores are bucketed (10 kcal wide by default) and a Fenwick tree keeps the
+number of users per bucket, so "how many users scored more than me" is one
+prefix sum and moving a user after a workout is two point updates. Within a
+bucket users are kept in a sorted list by exact score (bisect), which keeps
+ranks exact without scanning the bucket.
+
+WeeklyLeaderboard rebuilds the current and previous week from the store's
+weekly rollups on a timer (and when the week rolls over); between rebuilds
+it follows new workouts through FitnessStore.subscribe.
+"""
+import bisect
+import threading
+from datetime import date, timedelta
+
+from modules.rollups import bucket_of
+
+
+class FenwickTree:
+    """Counts per bucket with O(log n) point update, prefix sum and k-th search."""
+
+    def __init__(self, size):
+        self.size = size
+        self._tree = [0] * (size + 1)
+        self.total = 0
+
+    def add(self, index, delta):
+        self.total += delta
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index):
+        """Sum of counts in buckets 0..index inclusive."""
+        total = 0
+        i = min(index, self.size - 1) + 1
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, k):
+        """Smallest bucket whose prefix sum reaches k (1-based)."""
+        position = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = position + step
+            if nxt <= self.size and self._tree[nxt] < k:
+                position = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return position
+
+
+class Leaderboard:
+    def __init__(self, bucket_width=10.0, max_score=200_000.0):
+        self.bucket_width = bucket_width
+        self.n_buckets = int(max_score // bucket_width) + 1
+        self._counts = FenwickTree(self.n_buckets)
+        self._scores = {}
+        self._members = {}  # bucket -> sorted [(-score, user), ...]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._scores)
+
+    def _bucket(self, score):
+        return min(max(int(score // self.bucket_width), 0), self.n_buckets - 1)
+
+    def _remove(self, user):
+        score = self._scores.pop(user)
+        bucket = self._bucket(score)
+        self._counts.add(bucket, -1)
+        members = self._members[bucket]
+        del members[bisect.bisect_left(members, (-score, user))]
+        if not members:
+            del self._members[bucket]
+
+    def _insert(self, user, score):
+        bucket = self._bucket(score)
+        self._scores[user] = score
+        self._counts.add(bucket, 1)
+        bisect.insort(self._members.setdefault(bucket, []), (-score, user))
+
+    def set_score(self, user, score):
+        with self._lock:
+            if user in self._scores:
+                self._remove(user)
+            self._insert(user, score)
+
+    def add_score(self, user, delta):
+        with self._lock:
+            score = self._scores.get(user, 0.0) + delta
+            if user in self._scores:
+                self._remove(user)
+            self._insert(user, score)
+
+    def score(self, user):
+        return self._scores.get(user)
+
+    def rank(self, user):
+        """1-based rank of user (highest score first), or None if unranked."""
+        with self._lock:
+            score = self._scores.get(user)
+            if score is None:
+                return None
+            bucket = self._bucket(score)
+            above = self._counts.total - self._counts.prefix(bucket)
+            ahead = bisect.bisect_left(self._members[bucket], (-score, user))
+            return above + ahead + 1
+
+    def top(self, n=10):
+        """[(rank, user, score), ...] for the n highest scores."""
+        with self._lock:
+            rows = []
+            k = self._counts.total
+            while k > 0 and len(rows) < n:
+                members = self._members[self._counts.find(k)]
+                rows.extend((user, -negated) for negated, user in members[:n - len(rows)])
+                k -= len(members)
+            return [(rank, user, score) for rank, (user, score) in enumerate(rows, 1)]
+
+
+class WeeklyLeaderboard:
+    """Current and previous week's calorie leaderboards kept in sync with a store."""
+
+    def __init__(self, store, refresh_seconds=900, bucket_width=10.0):
+        self.store = store
+        self.refresh_seconds = refresh_seconds
+        self.bucket_width = bucket_width
+        self.week = None
+        self.current = self.previous = Leaderboard(bucket_width)
+        self._timer = None
+        store.subscribe(self._on_rows)
+        self.refresh()
+
+    def _build(self, week):
+        board = Leaderboard(self.bucket_width)
+        for user, calories in self.store.period_totals("week", week):
+            board.set_score(user, calories or 0.0)
+        return board
+
+    def refresh(self, today=None):
+        """Rebuild both weeks from the rollups (the authoritative totals)."""
+        week = bucket_of(today or date.today(), "week")
+        # No batch may commit between reading the totals and the swap, or
+        # _on_rows would add it to the board being replaced
+        with self.store.write_lock:
+            current = self._build(week)
+            previous = self._build(date.fromisoformat(week) - timedelta(days=7))
+            self.current, self.previous, self.week = current, previous, week
+
+    def _on_rows(self, table, rows):
+        if table != "workouts":
+            return
+        for row in rows:
+            week = bucket_of(row["day"], "week")
+            if self.week is not None and week > self.week:
+                # A new week started: take the scheduled rebuild now
+                self.refresh(date.fromisoformat(row["day"]))
+                return
+            if week == self.week and row.get("calories"):
+                self.current.add_score(row["user"], row["calories"])
+
+    def start(self):
+        """Refresh every refresh_seconds on a daemon timer thread."""
+        def tick():
+            self.refresh()
+            self.start()
+
+        self._timer = threading.Timer(self.refresh_seconds, tick)
+        self._timer.daemon = True
+        self._timer.start()
+        return self
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def standing(self, user):
+        """(rank, users ranked, change since last week) for user this week."""
+        rank = self.current.rank(user)
+        previous = self.previous.rank(user)
+        change = previous - rank if rank is not None and previous is not None else None
+        return rank, len(self.current), change
@@ -0,0 +1,110 @@
+"""Learning curves over a log-spaced grid of training-set sizes.
+
+Replaces the notebook's plot_learning_curve, which refit the model for every
+m in range(1, 1000) and appended into module-level lists. LinearRegression
+is handled in one pass by growing the normal equations X'X and X'y between
+grid sizes (each new row is a rank-one update); any other estimator is
+cloned and refit per grid size in parallel.
+"""
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.linear_model import LinearRegression
+
+
+@dataclass
+class LearningCurve:
+    sizes: np.ndarray
+    train_rmse: np.ndarray
+    val_rmse: np.ndarray
+    seconds: float
+    method: str  # "normal-equations" or "refit"
+
+    def as_frame(self):
+        return pd.DataFrame({"size": self.sizes, "train_rmse": self.train_rmse,
+                             "val_rmse": self.val_rmse})
+
+    def plot(self, ax=None):
+        import matplotlib.pyplot as plt
+
+        ax = ax or plt.gca()
+        ax.plot(self.sizes, self.train_rmse, "r-+", linewidth=2, label="Train")
+        ax.plot(self.sizes, self.val_rmse, "b-", linewidth=3, label="Val")
+        ax.set_xscale("log")
+        ax.set_title("learning curve")
+        ax.set_xlabel("training set size")
+        ax.set_ylabel("Root Mean Squared Error")
+        ax.legend()
+        return ax
+
+
+def size_grid(n_samples, n_points=30, min_size=2):
+    """Log-spaced, de-duplicated integer sizes from min_size to n_samples."""
+    min_size = max(1, min(min_size, n_samples))
+    grid = np.geomspace(min_size, n_samples, num=n_points).round().astype(int)
+    return np.unique(np.clip(grid, min_size, n_samples))
+
+
+def _rmse(y_true, y_pred):
+    return float(np.sqrt(np.mean((y_true - y_pred) ** 2)))
+
+
+def _linear_curve(model, X, y, X_val, y_val, sizes):
+    # The normal equations only grow, so walk the sizes in ascending order
+    # once and hand the results back in the caller's order
+    grid, order = np.unique(sizes, return_inverse=True)
+    if model.fit_intercept:
+        X = np.column_stack([X, np.ones(len(X))])
+        X_val = np.column_stack([X_val, np.ones(len(X_val))])
+    p = X.shape[1]
+    gram = np.zeros((p, p))
+    moment = np.zeros(p)
+    train_rmse, val_rmse = [], []
+    done = 0
+    for m in grid:
+        block, target = X[done:m], y[done:m]
+        gram += block.T @ block
+        moment += block.T @ target
+        done = m
+        # lstsq still returns a solution while m < p and X'X is singular
+        coef = np.linalg.lstsq(gram, moment, rcond=None)[0]
+        train_rmse.append(_rmse(y[:m], X[:m] @ coef))
+        val_rmse.append(_rmse(y_val, X_val @ coef))
+    return np.array(train_rmse)[order], np.array(val_rmse)[order]
+
+
+def _refit_point(model, X, y, X_val, y_val):
+    model.fit(X, y)
+    return _rmse(y, model.predict(X)), _rmse(y_val, model.predict(X_val))
+
+
+def learning_curve(model, X_train, y_train, X_val, y_val, sizes=None, n_points=30,
+                   n_jobs=-1):
+    """Train/validation RMSE of ``model`` for growing prefixes of the training set.
+
+    Validation error is always measured on the full validation set. ``model``
+    itself is left unfitted.
+    """
+    X = np.asarray(X_train, dtype=float)
+    y = np.asarray(y_train, dtype=float)
+    X_val = np.asarray(X_val, dtype=float)
+    y_val = np.asarray(y_val, dtype=float)
+    if sizes is None:
+        sizes = size_grid(len(X), n_points)
+    sizes = np.asarray(sizes, dtype=int)
+
+    start = time.perf_counter()
+    if type(model) is LinearRegression and not model.positive:
+        train_rmse, val_rmse = _linear_curve(model, X, y, X_val, y_val, sizes)
+        method = "normal-equations"
+    else:
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(_refit_point)(clone(model), X[:m], y[:m], X_val, y_val) for m in sizes
+        )
+        train_rmse, val_rmse = (np.array(s) for s in zip(*scores))
+        method = "refit"
+    return LearningCurve(sizes, train_rmse, val_rmse, time.perf_counter() - start, method)
@@ -0,0 +1,232 @@
+"""Calorie-prediction model trained on exercise.csv + calories.csv.
+
+Mirrors the pipeline in fitness.ipynb (merge on User_ID, drop duplicates,
+BMI feature, one-hot Gender, 80/20 split with random_state=1) restricted to
+the inputs the dashboard actually collects, so the same model can score a
+single user from the sliders in app.py.
+"""
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from functools import partial
+from datetime import datetime, timezone
+
+import joblib
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from sklearn import metrics
+import sklearn
+
+from modules.compiled import compile_estimator, load_compiled, save_compiled
+from modules.data import CALORIES_CSV, EXERCISE_CSV, ROOT, load_dataset
+from modules.features import FEATURES, build_features
+from modules.features import schema as feature_schema
+
+MODELS_DIR = os.path.join(ROOT, "models")
+LATEST_FILE = "LATEST"
+
+TARGET = "Calories"
+# Up to the prediction server's default batch the compiled walk is within
+# ~20% of sklearn's; larger batches (batch scoring) use the estimator
+COMPILED_MAX_ROWS = 256
+
+
+def load_training_frame(exercise_path=EXERCISE_CSV, calories_path=CALORIES_CSV):
+    exercise_df, _ = load_dataset(exercise_path, calories_path)
+    return exercise_df.drop(columns="User_ID")
+
+
+def make_estimator(kind="forest"):
+    if kind == "forest":
+        return RandomForestRegressor(n_estimators=50, random_state=1, n_jobs=-1)
+    if kind == "linear":
+        return LinearRegression()
+    raise ValueError(f"Unknown model kind: {kind!r}")
+
+
+class CalorieModel:
+    """A fitted estimator plus the scaler and feature order it expects.
+
+    estimator may be None with load_estimator a zero-argument callable; it
+    is then only loaded the first time a batch too big for compiled needs it.
+    """
+
+    def __init__(self, estimator, scaler=None, features=FEATURES, metrics=None,
+                 version=None, compiled=None, load_estimator=None):
+        self._estimator = estimator
+        self._load_estimator = load_estimator
+        self._estimator_lock = threading.Lock()
+        self.scaler = scaler
+        self.features = list(features)
+        self.metrics = metrics or {}
+        self.version = version
+        self.compiled = compiled  # flat NumPy copy used for small batches
+
+    @property
+    def estimator(self):
+        if self._estimator is None and self._load_estimator is not None:
+            with self._estimator_lock:
+                if self._estimator is None:
+                    self._estimator = self._load_estimator()
+        return self._estimator
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=float)
+        if self.scaler is not None:
+            # Same arithmetic as StandardScaler.transform without its
+            # per-call input validation.
+            X = (X - self.scaler.mean_) / self.scaler.scale_
+        if self.compiled is not None and len(X) <= COMPILED_MAX_ROWS:
+            return self.compiled.predict(X)
+        if isinstance(self.estimator, RandomForestRegressor) and len(X) <= 64:
+            # RandomForestRegressor.predict spins up joblib for every call,
+            # which costs milliseconds; walking the trees directly is ~20x
+            # cheaper for the handful of rows the dashboard scores.
+            X32 = X.astype(np.float32)
+            total = np.zeros(len(X))
+            for tree in self.estimator.estimators_:
+                total += tree.tree_.predict(X32).ravel()
+            return total / len(self.estimator.estimators_)
+        return self.estimator.predict(X)
+
+    def predict_one(self, age, weight, height, duration, heart_rate, gender):
+        """Predict calories for one user; returns (kcal, latency_ms)."""
+        start = time.perf_counter()
+        row = build_features({"Gender": [gender], "Age": [age], "Height": [height],
+                              "Weight": [weight], "Duration": [duration],
+                              "Heart_Rate": [heart_rate]})
+        kcal = float(self.predict(row)[0])
+        return kcal, (time.perf_counter() - start) * 1000
+
+
+def evaluate(model, X_test, y_test):
+    prediction = model.predict(X_test)
+    mse = metrics.mean_squared_error(y_test, prediction)
+    return {
+        "mae": round(float(metrics.mean_absolute_error(y_test, prediction)), 3),
+        "mse": round(float(mse), 3),
+        "rmse": round(float(np.sqrt(mse)), 3),
+    }
+
+
+def train_model(kind="forest", exercise_path=EXERCISE_CSV, calories_path=CALORIES_CSV):
+    exercise_df = load_training_frame(exercise_path, calories_path)
+    train, test = train_test_split(exercise_df, test_size=0.2, random_state=1)
+    X_train = build_features(train)
+    scaler = StandardScaler().fit(X_train)
+    estimator = make_estimator(kind)
+    estimator.fit(scaler.transform(X_train), train[TARGET].to_numpy())
+    if hasattr(estimator, "n_jobs"):
+        # Scoring happens one row at a time; a worker pool only adds latency.
+        estimator.set_params(n_jobs=None)
+    model = CalorieModel(estimator, scaler, compiled=compile_estimator(estimator))
+    model.metrics = evaluate(model, build_features(test), test[TARGET].to_numpy())
+    model.metrics.update(n_train=len(train), n_test=len(test))
+    return model
+
+
+def data_fingerprint(*paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def save_model(model, models_dir=MODELS_DIR, kind="forest", data_hash=None):
+    """Write model into a new versioned directory and point LATEST at it.
+
+    Layout: <models_dir>/<version>/{model.joblib, scaler.joblib, compiled.npz,
+    schema.json}. The joblib files are written uncompressed so they can be
+    memory-mapped; compiled.npz is the flat NumPy form from modules.compiled.
+    """
+    created = datetime.now(timezone.utc)
+    base = f"{kind}-{created:%Y%m%d%H%M%S}"
+    if data_hash:
+        base += f"-{data_hash[:8]}"
+    # Two saves in the same second (and of the same data) get -2, -3, ...;
+    # an existing version directory is never written into
+    for n in itertools.count(1):
+        version = base if n == 1 else f"{base}-{n}"
+        path = os.path.join(models_dir, version)
+        try:
+            os.makedirs(path)
+            break
+        except FileExistsError:
+            continue
+
+    joblib.dump(model.estimator, os.path.join(path, "model.joblib"))
+    joblib.dump(model.scaler, os.path.join(path, "scaler.joblib"))
+    save_compiled(model.compiled or compile_estimator(model.estimator), path)
+    schema = {
+        "version": version,
+        "kind": kind,
+        "features": model.features,
+        "target": TARGET,
+        "encoding": feature_schema(),
+        "metrics": model.metrics,
+        "data_sha256": data_hash,
+        "sklearn_version": sklearn.__version__,
+        "created_at": created.isoformat(),
+    }
+    with open(os.path.join(path, "schema.json"), "w") as f:
+        json.dump(schema, f, indent=2)
+
+    # Swap the pointer atomically so a reader never sees a half-written name
+    tmp = os.path.join(models_dir, LATEST_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(models_dir, LATEST_FILE))
+    model.version = version
+    return path
+
+
+def latest_model_path(models_dir=MODELS_DIR):
+    """Directory of the newest saved artifact, or None if nothing was trained."""
+    try:
+        with open(os.path.join(models_dir, LATEST_FILE)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(models_dir, version)
+    return path if os.path.isdir(path) else None
+
+
+def load_model(path=None, mmap_mode="r"):
+    """Load a saved artifact, memory-mapping its numpy buffers by default.
+
+    With mmap_mode="r" compiled.npz and the arrays joblib stored are mapped
+    read-only from the page cache, so worker processes loading the same
+    version share them. sklearn trees copy their node arrays when unpickled,
+    so model.joblib is only loaded once a batch over COMPILED_MAX_ROWS needs
+    it; the dashboard and prediction server never do.
+    """
+    path = path or latest_model_path()
+    if path is None:
+        raise FileNotFoundError("No trained model found; run `python -m modules.train`")
+    with open(os.path.join(path, "schema.json")) as f:
+        schema = json.load(f)
+    if schema["features"] != FEATURES:
+        raise ValueError(
+            f"Model {schema['version']} expects features {schema['features']}, "
+            f"this code builds {FEATURES}"
+        )
+    load_estimator = partial(joblib.load, os.path.join(path, "model.joblib"),
+                             mmap_mode=mmap_mode)
+    scaler = joblib.load(os.path.join(path, "scaler.joblib"), mmap_mode=mmap_mode)
+    compiled = load_compiled(path, mmap_mode)
+    if compiled is None:
+        # Artifacts saved before compiled.npz existed are compiled on load
+        estimator = load_estimator()
+        return CalorieModel(estimator, scaler, schema["features"], schema["metrics"],
+                            schema["version"], compile_estimator(estimator))
+    return CalorieModel(None, scaler, schema["features"], schema["metrics"],
+                        schema["version"], compiled, load_estimator)
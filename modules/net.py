@@ -0,0 +1,9 @@
+"""Socket address strings shared by the prediction server and sensor listener."""
+
+
+def parse_address(address):
+    """("unix", path) for "unix:/path", otherwise ("tcp", (host, port))."""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, port = address.rsplit(":", 1)
+    return "tcp", (host, int(port))
@@ -0,0 +1,145 @@
+"""Cross-session memo of calorie predictions keyed on the dashboard inputs.
+
+Every model input in app.py is a bounded integer slider (plus gender), so
+sessions keep asking for the same few thousand tuples. PredictionCache maps
+the (optionally quantized) tuple to the predicted kcal with LRU eviction and
+a TTL, and drops everything when the predictor reports a different model
+version. ``prewarm`` fills it in one vectorized predict call with every
+tuple one slider move away from the default profile.
+"""
+import threading
+import time
+from collections import OrderedDict
+from itertools import product
+
+import numpy as np
+
+from modules.features import build_features
+
+INPUTS = ("age", "weight", "height", "duration", "heart_rate", "gender")
+
+# app.py's slider defaults and ranges
+DEFAULT_PROFILE = {"age": 28, "weight": 75, "height": 175, "duration": 45, "heart_rate": 125}
+SLIDER_RANGES = {
+    "age": range(1, 101),
+    "weight": range(40, 201),
+    "height": range(120, 221),
+    "duration": range(1, 181),
+    "heart_rate": range(50, 201),
+}
+GENDERS = ("Male", "Female", "Other")
+
+
+class PredictionCache:
+    """Thread-safe LRU + TTL cache in front of anything with predict_one/predict.
+
+    quantize maps input names to a step, e.g. {"heart_rate": 5} buckets heart
+    rate to multiples of 5; the prediction is then made for the bucket value
+    so every input mapping to a key gets the same answer.
+    """
+
+    def __init__(self, maxsize=20_000, ttl=24 * 3600, quantize=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.quantize = dict(quantize or {})
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.invalidations = 0
+
+    def key(self, age, weight, height, duration, heart_rate, gender):
+        values = []
+        for name, value in zip(INPUTS[:-1], (age, weight, height, duration, heart_rate)):
+            step = self.quantize.get(name)
+            values.append(round(value / step) * step if step else value)
+        return (*values, str(gender).lower())
+
+    def _check_version(self, version):
+        if version != self.version:
+            self._entries.clear()
+            if self.version is not None:
+                self.invalidations += 1
+            self.version = version
+
+    def _get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None or now - entry[1] > self.ttl:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _put(self, key, kcal, now):
+        self._entries[key] = (kcal, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def predict_one(self, predictor, age, weight, height, duration, heart_rate, gender):
+        """(kcal, latency_ms) for the inputs, calling predictor only on a miss."""
+        start = time.perf_counter()
+        key = self.key(age, weight, height, duration, heart_rate, gender)
+        version = getattr(predictor, "version", None)
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(version)
+            kcal = self._get(key, now)
+            if kcal is not None:
+                self.hits += 1
+                return kcal, (time.perf_counter() - start) * 1000
+            self.misses += 1
+        kcal, _ = predictor.predict_one(*key[:-1], gender)
+        with self._lock:
+            self._put(key, kcal, now)
+        return kcal, (time.perf_counter() - start) * 1000
+
+    def prewarm(self, predictor, rows=None, genders=GENDERS):
+        """Predict rows (input tuples without gender) for each gender in one batch.
+
+        By default rows are the default profile plus every value of one slider
+        at a time, i.e. every state reachable with a single slider move.
+        Returns the number of entries added.
+        """
+        if rows is None:
+            rows = neighbourhood(DEFAULT_PROFILE, SLIDER_RANGES)
+        keys = list(dict.fromkeys(self.key(*row, gender) for row, gender in product(rows, genders)))
+        keys = keys[-self.maxsize:]
+        columns = np.array([k[:-1] for k in keys], dtype=float)
+        X = build_features({
+            "Age": columns[:, 0], "Weight": columns[:, 1], "Height": columns[:, 2],
+            "Duration": columns[:, 3], "Heart_Rate": columns[:, 4],
+            "Gender": [k[-1] for k in keys],
+        })
+        predictions = predictor.predict(X)
+        version = getattr(predictor, "version", None)
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(version)
+            for key, kcal in zip(keys, predictions):
+                self._put(key, float(kcal), now)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "invalidations": self.invalidations,
+                "version": self.version,
+            }
+
+
+def neighbourhood(profile, ranges):
+    """Input tuples that differ from profile in at most one input."""
+    base = tuple(profile[name] for name in INPUTS[:-1])
+    rows = [base]
+    for i, name in enumerate(INPUTS[:-1]):
+        for value in ranges.get(name, ()):
+            rows.append(base[:i] + (value,) + base[i + 1:])
+    return rows
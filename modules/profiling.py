@@ -0,0 +1,130 @@
+"""In-process latency recording for the dashboard's hot paths.
+
+``timed(name)`` works as a context manager or a decorator and appends one
+(timestamp, name, seconds) sample to a bounded ring buffer shared by the
+whole server process, so memory stays flat however long it runs. The buffer
+can be summarised as percentiles, exported as Prometheus text or JSON lines,
+and a single rerun can be captured with cProfile (or pyinstrument when it is
+installed).
+"""
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import pyinstrument
+except ImportError:  # optional; cProfile is always available
+    pyinstrument = None
+
+DEFAULT_CAPACITY = 4096
+QUANTILES = (0.5, 0.9, 0.99)
+METRIC_NAME = "fitmetrics_section_seconds"
+
+
+class LatencyRecorder:
+    """Thread-safe ring buffer of named latency samples."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self._samples = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._samples.append((time.time(), name, seconds))
+
+    @contextmanager
+    def timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def samples(self, name=None):
+        with self._lock:
+            samples = list(self._samples)
+        return [s for s in samples if name is None or s[1] == name]
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def _by_name(self):
+        grouped = {}
+        for _, name, seconds in self.samples():
+            grouped.setdefault(name, []).append(seconds)
+        return {name: np.asarray(values) for name, values in sorted(grouped.items())}
+
+    def summary(self):
+        """One dict per name: count, p50/p90/p99/max/last in milliseconds."""
+        rows = []
+        for name, values in self._by_name().items():
+            ms = values * 1000
+            row = {"section": name, "count": len(ms)}
+            for q in QUANTILES:
+                row[f"p{round(q * 100)}_ms"] = round(float(np.quantile(ms, q)), 3)
+            row.update(max_ms=round(float(ms.max()), 3), last_ms=round(float(ms[-1]), 3))
+            rows.append(row)
+        return rows
+
+    def prometheus(self, metric=METRIC_NAME):
+        """Prometheus text exposition of the buffer as one summary metric."""
+        lines = [f"# HELP {metric} Section latency over the last samples in this process.",
+                 f"# TYPE {metric} summary"]
+        for name, values in self._by_name().items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for q in QUANTILES:
+                lines.append(f'{metric}{{section="{label}",quantile="{q}"}} '
+                             f"{float(np.quantile(values, q)):.6f}")
+            lines.append(f'{metric}_sum{{section="{label}"}} {float(values.sum()):.6f}')
+            lines.append(f'{metric}_count{{section="{label}"}} {len(values)}')
+        return "\n".join(lines) + "\n"
+
+    def jsonl(self):
+        return "".join(json.dumps({"ts": round(ts, 6), "section": name, "seconds": seconds}) + "\n"
+                       for ts, name, seconds in self.samples())
+
+
+# Shared by every session in the server process
+recorder = LatencyRecorder()
+
+
+def timed(name):
+    """Record the duration of a block (or of every call, as a decorator)."""
+    return recorder.timed(name)
+
+
+class RerunProfiler:
+    """Profile everything between start() and stop(); stop() returns a text report."""
+
+    def __init__(self, engine="cprofile", limit=40):
+        if engine == "pyinstrument" and pyinstrument is None:
+            raise ImportError("pyinstrument is not installed")
+        self.engine = engine
+        self.limit = limit
+        self._profiler = None
+
+    def start(self):
+        if self.engine == "pyinstrument":
+            self._profiler = pyinstrument.Profiler()
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def stop(self):
+        if self.engine == "pyinstrument":
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True)
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(self.limit)
+        return out.getvalue()
@@ -0,0 +1,137 @@
+"""Daily/weekly/monthly workout aggregates maintained on write.
+
+FitnessStore.add_workouts folds every inserted batch into the rollups table
+inside the same transaction, so the Performance Analytics charts read a
+handful of pre-aggregated rows per period instead of re-scanning a user's
+whole workout history on each rerun.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+import pandas as pd
+
+PERIODS = ("day", "week", "month")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    user TEXT NOT NULL,
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    workouts INTEGER NOT NULL DEFAULT 0,
+    calories REAL NOT NULL DEFAULT 0,
+    duration_min REAL NOT NULL DEFAULT 0,
+    steps INTEGER NOT NULL DEFAULT 0,
+    hr_min REAL,
+    hr_max REAL,
+    hr_sum REAL NOT NULL DEFAULT 0,
+    hr_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user, period, bucket)
+) WITHOUT ROWID;
+"""
+
+UPSERT = """
+INSERT INTO rollups (user, period, bucket, workouts, calories, duration_min, steps,
+                     hr_min, hr_max, hr_sum, hr_count)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user, period, bucket) DO UPDATE SET
+    workouts = workouts + excluded.workouts,
+    calories = calories + excluded.calories,
+    duration_min = duration_min + excluded.duration_min,
+    steps = steps + excluded.steps,
+    hr_min = MIN(COALESCE(hr_min, excluded.hr_min), COALESCE(excluded.hr_min, hr_min)),
+    hr_max = MAX(COALESCE(hr_max, excluded.hr_max), COALESCE(excluded.hr_max, hr_max)),
+    hr_sum = hr_sum + excluded.hr_sum,
+    hr_count = hr_count + excluded.hr_count
+"""
+
+
+def bucket_of(day, period):
+    """Bucket label for an ISO date: the day, its week's Monday, or YYYY-MM."""
+    d = date.fromisoformat(day) if isinstance(day, str) else day
+    if period == "day":
+        return d.isoformat()
+    if period == "week":
+        return (d - timedelta(days=d.weekday())).isoformat()
+    if period == "month":
+        return d.strftime("%Y-%m")
+    raise ValueError(f"Unknown period: {period!r}")
+
+
+def apply(conn, workouts):
+    """Fold workout rows into the rollups using the caller's transaction.
+
+    The batch is aggregated in Python first, so a batch of n workouts costs
+    one upsert per touched (user, period, bucket) rather than n.
+    """
+    totals = defaultdict(lambda: [0, 0.0, 0.0, 0, None, None, 0.0, 0])
+    for row in workouts:
+        hr = row.get("heart_rate")
+        for period in PERIODS:
+            t = totals[(row["user"], period, bucket_of(row["day"], period))]
+            t[0] += 1
+            t[1] += row.get("calories") or 0
+            t[2] += row.get("duration_min") or 0
+            t[3] += row.get("steps") or 0
+            if hr is not None:
+                t[4] = hr if t[4] is None else min(t[4], hr)
+                t[5] = hr if t[5] is None else max(t[5], hr)
+                t[6] += hr
+                t[7] += 1
+    conn.executemany(UPSERT, [key + tuple(t) for key, t in totals.items()])
+
+
+def rebuild(conn, user=None):
+    """Recompute rollups from the raw workouts table (backfill or repair)."""
+    where, params = ("WHERE user = ?", (user,)) if user else ("", ())
+    conn.execute(f"DELETE FROM rollups {where}", params)
+    cursor = conn.execute(
+        f"SELECT user, day, calories, duration_min, steps, heart_rate FROM workouts {where}",
+        params)
+    columns = [c[0] for c in cursor.description]
+    while True:
+        batch = cursor.fetchmany(10_000)
+        if not batch:
+            break
+        apply(conn, [dict(zip(columns, row)) for row in batch])
+
+
+def series(conn, user, period="day", start=None, end=None):
+    """Rollup rows for user as a DataFrame indexed by bucket, oldest first.
+
+    start/end are dates (or ISO strings) and are mapped to their buckets.
+    """
+    clauses, params = ["user = ?", "period = ?"], [user, period]
+    if start is not None:
+        clauses.append("bucket >= ?")
+        params.append(bucket_of(start, period))
+    if end is not None:
+        clauses.append("bucket <= ?")
+        params.append(bucket_of(end, period))
+    frame = pd.read_sql_query(
+        "SELECT bucket, workouts, calories, duration_min, steps, hr_min, hr_max, "
+        "hr_sum / NULLIF(hr_count, 0) AS hr_mean FROM rollups "
+        f"WHERE {' AND '.join(clauses)} ORDER BY bucket",
+        conn, params=params)
+    return frame.set_index("bucket")
+
+
+def totals(conn, period, bucket, column="calories"):
+    """(user, total) for every user with activity in one bucket, e.g. a week."""
+    if column not in ("workouts", "calories", "duration_min", "steps"):
+        raise ValueError(f"Unknown rollup column: {column!r}")
+    return conn.execute(
+        f"SELECT user, {column} FROM rollups WHERE period = ? AND bucket = ?",
+        (period, bucket_of(bucket, period))).fetchall()
+
+
+def daily_window(conn, user, days=7, end=None):
+    """The last ``days`` daily rollups with missing days filled as zero."""
+    end = end or date.today()
+    start = end - timedelta(days=days - 1)
+    frame = series(conn, user, "day", start, end)
+    index = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+    frame = frame.reindex(index)
+    counts = ["workouts", "calories", "duration_min", "steps"]
+    frame[counts] = frame[counts].fillna(0)
+    frame.index.name = "bucket"
+    return frame
@@ -0,0 +1,289 @@
+"""Incremental achievement and challenge evaluation.
+
+RulesEngine keeps a small UserState per user (streaks, cumulative totals,
+today's steps and water) and updates it in O(1) for every workout or
+nutrition row the store commits, then checks each rule against the new
+state. Rules are thresholds on a state metric, so when the engine starts,
+or a rule is added later, the full history is replayed in one vectorized
+pass: the per-day timeline of every metric is computed with pandas and the
+first day each user crossed each threshold becomes the award date. A row
+dated before the user's latest day (a backdated log) rebuilds that user's
+state from their history the same way.
+"""
+import threading
+from dataclasses import dataclass, fields, replace
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+# Daily metrics reset at midnight; everything else only grows
+DAILY_METRICS = ("day_steps", "day_water_ml")
+
+
+@dataclass(frozen=True)
+class Achievement:
+    name: str
+    icon: str
+    metric: str
+    threshold: float
+
+
+@dataclass(frozen=True)
+class Challenge:
+    name: str
+    metric: str
+    goal: float
+
+    def progress(self, value):
+        """Percent complete, capped at 100."""
+        return round(min(value / self.goal, 1.0) * 100, 1)
+
+
+ACHIEVEMENTS = [
+    Achievement("7-Day Streak", "🔥", "best_streak", 7),
+    Achievement("First 10K", "💪", "best_day_steps", 10_000),
+    Achievement("Marathon Ready", "🏃", "longest_workout", 120),
+    Achievement("Yoga Master", "🧘", "yoga_sessions", 20),
+    Achievement("Elite Status", "🏆", "workouts", 100),
+]
+
+CHALLENGES = [
+    Challenge("10K Steps Daily", "day_steps", 10_000),
+    Challenge("30 Day Yoga", "yoga_sessions", 30),
+    Challenge("Hydration Master", "day_water_ml", 3000),
+]
+
+
+def _as_date(day):
+    return date.fromisoformat(day) if isinstance(day, str) else day
+
+
+@dataclass
+class UserState:
+    last_workout_day: date = None
+    streak: int = 0
+    best_streak: int = 0
+    workouts: int = 0
+    steps: int = 0
+    calories: float = 0.0
+    longest_workout: float = 0.0
+    yoga_sessions: int = 0
+    water_ml: float = 0.0
+    day: date = None  # the day the daily counters below belong to
+    day_steps: int = 0
+    best_day_steps: int = 0
+    day_water_ml: float = 0.0
+
+    def _roll_day(self, day):
+        """Reset the daily counters when day is newer; False for backdated rows."""
+        if self.day is None or day > self.day:
+            self.day, self.day_steps, self.day_water_ml = day, 0, 0.0
+        return day == self.day
+
+    def apply_workout(self, row):
+        day = _as_date(row["day"])
+        self.workouts += 1
+        self.calories += row.get("calories") or 0
+        self.longest_workout = max(self.longest_workout, row.get("duration_min") or 0)
+        if (row.get("workout_type") or "").lower() == "yoga":
+            self.yoga_sessions += 1
+
+        if self.last_workout_day is None or day > self.last_workout_day:
+            consecutive = (self.last_workout_day is not None
+                           and (day - self.last_workout_day).days == 1)
+            self.streak = self.streak + 1 if consecutive else 1
+            self.best_streak = max(self.best_streak, self.streak)
+            self.last_workout_day = day
+
+        # Steps come from the "Daily Steps" input, i.e. the day's running total
+        if self._roll_day(day):
+            steps = row.get("steps") or 0
+            if steps > self.day_steps:
+                self.steps += steps - self.day_steps
+                self.day_steps = steps
+                self.best_day_steps = max(self.best_day_steps, steps)
+
+    def apply_nutrition(self, row):
+        water = row.get("water_ml") or 0
+        self.water_ml += water
+        if self._roll_day(_as_date(row["day"])):
+            self.day_water_ml += water
+
+    def current_streak(self, today=None):
+        """streak while it is still alive, i.e. the last workout was today or yesterday."""
+        today = today or date.today()
+        if self.last_workout_day is None or (today - self.last_workout_day).days > 1:
+            return 0
+        return self.streak
+
+    def value(self, metric, today=None):
+        if metric in DAILY_METRICS and self.day != (today or date.today()):
+            return 0
+        return getattr(self, metric)
+
+
+def timeline(workouts, nutrition):
+    """Per (user, day) values of every UserState metric as of the end of that day.
+
+    workouts/nutrition are DataFrames in the store's column layout. Rows are
+    ordered by user and day.
+    """
+    # astype: empty query results come back as object columns
+    w = workouts.astype({"calories": float, "duration_min": float, "steps": float})
+    w = w.assign(day=pd.to_datetime(w["day"]),
+                 yoga=w["workout_type"].fillna("").str.lower().eq("yoga"))
+    daily = w.groupby(["user", "day"]).agg(
+        day_workouts=("day", "size"), day_calories=("calories", "sum"),
+        day_longest=("duration_min", "max"), day_steps=("steps", "max"),
+        day_yoga=("yoga", "sum"))
+    n = nutrition.astype({"water_ml": float})
+    water = (n.assign(day=pd.to_datetime(n["day"]))
+             .groupby(["user", "day"])["water_ml"].sum().rename("day_water_ml"))
+    frame = daily.join(water, how="outer").fillna(0).reset_index()
+    frame = frame.sort_values(["user", "day"], ignore_index=True)
+    by_user = frame.groupby("user")
+
+    frame["workouts"] = by_user["day_workouts"].cumsum().astype(int)
+    frame["calories"] = by_user["day_calories"].cumsum()
+    frame["longest_workout"] = by_user["day_longest"].cummax()
+    frame["yoga_sessions"] = by_user["day_yoga"].cumsum().astype(int)
+    frame["steps"] = by_user["day_steps"].cumsum().astype(int)
+    frame["best_day_steps"] = by_user["day_steps"].cummax().astype(int)
+    frame["water_ml"] = by_user["day_water_ml"].cumsum()
+
+    # Streaks: runs of consecutive workout days, numbered with one cumsum
+    active = frame[frame["day_workouts"] > 0]
+    day_number = (active["day"] - pd.Timestamp("1970-01-01")).dt.days.to_numpy()
+    same_user = active["user"].to_numpy()[1:] == active["user"].to_numpy()[:-1]
+    starts = np.ones(len(active), dtype=bool)
+    starts[1:] = ~(same_user & (np.diff(day_number) == 1))
+    runs = np.cumsum(starts)
+    streak = pd.Series(1, index=active.index).groupby(runs).cumsum()
+    frame["streak"] = streak.reindex(frame.index)
+    frame["last_workout_day"] = frame["day"].where(frame["day_workouts"] > 0)
+    frame[["streak", "last_workout_day"]] = frame.groupby("user")[
+        ["streak", "last_workout_day"]].ffill()
+    frame["streak"] = frame["streak"].fillna(0).astype(int)
+    frame["best_streak"] = frame.groupby("user")["streak"].cummax()
+    frame["day_steps"] = frame["day_steps"].astype(int)
+    return frame
+
+
+def first_crossings(frame, rule):
+    """{user: first day} on which rule.metric reached rule.threshold."""
+    hits = frame.loc[frame[rule.metric] >= rule.threshold, ["user", "day"]]
+    return hits.groupby("user")["day"].first().dt.date.to_dict()
+
+
+def states_from_timeline(frame):
+    state_fields = {f.name for f in fields(UserState)}
+    states = {}
+    for row in frame.groupby("user").tail(1).to_dict("records"):
+        values = {k: v for k, v in row.items() if k in state_fields}
+        values["day"] = row["day"].date()
+        last = values.get("last_workout_day")
+        values["last_workout_day"] = None if pd.isna(last) else last.date()
+        states[row["user"]] = UserState(**values)
+    return states
+
+
+class RulesEngine:
+    """Awards achievements and updates challenge progress as rows arrive."""
+
+    def __init__(self, store, achievements=ACHIEVEMENTS, challenges=CHALLENGES):
+        self.store = store
+        self.achievements = list(achievements)
+        self.challenges = list(challenges)
+        self.states = {}
+        self._earned = {}  # user -> set of achievement names
+        # Taken after store.write_lock (store listeners run under it) and
+        # around every read of self.states
+        self._lock = threading.RLock()
+        self.replay()
+        store.subscribe(self.on_rows)
+
+    def _earned_by(self, user):
+        if user not in self._earned:
+            self._earned[user] = {a["name"] for a in self.store.achievements(user)}
+        return self._earned[user]
+
+    def replay(self, rules=None):
+        """Rebuild every user's state from history and award rules (default: all)."""
+        with self.store.write_lock, self._lock:
+            self._replay(rules)
+
+    def _replay(self, rules):
+        frame = timeline(self.store.history("workouts"), self.store.history("nutrition"))
+        if frame.empty:
+            return
+        self.states = states_from_timeline(frame)
+        for rule in self.achievements if rules is None else rules:
+            for user, day in first_crossings(frame, rule).items():
+                if rule.name not in self._earned_by(user):
+                    self.store.award(user, rule.name, day.isoformat())
+                    self._earned[user].add(rule.name)
+        self.store.update_challenges(
+            [(user, challenge.name, progress) for user in self.states
+             for challenge, progress in self.challenge_progress(user)])
+
+    def add_achievement(self, rule):
+        """Register a new rule and award it retroactively from history."""
+        self.achievements.append(rule)
+        self.replay([rule])
+
+    def on_rows(self, table, rows):
+        if table not in ("workouts", "nutrition"):
+            return
+        with self._lock:
+            backdated = set()
+            for row in rows:
+                user = row["user"]
+                state = self.states.setdefault(user, UserState())
+                if user in backdated or (state.day is not None
+                                         and _as_date(row["day"]) < state.day):
+                    # Earlier days' steps, water and streaks can't be patched in
+                    # place; the rows are committed, so rebuild from history
+                    backdated.add(user)
+                    continue
+                if table == "workouts":
+                    state.apply_workout(row)
+                else:
+                    state.apply_nutrition(row)
+                self._evaluate(user, state, row.get("logged_at"))
+            for user in backdated:
+                self.states[user] = self._rebuild(user)
+                self._evaluate(user, self.states[user])
+
+    def _rebuild(self, user):
+        frame = timeline(self.store.history("workouts", user),
+                         self.store.history("nutrition", user))
+        return states_from_timeline(frame).get(user, UserState())
+
+    def _evaluate(self, user, state, when=None):
+        earned = self._earned_by(user)
+        for rule in self.achievements:
+            if rule.name not in earned and state.value(rule.metric) >= rule.threshold:
+                self.store.award(user, rule.name,
+                                 when or datetime.now().isoformat(timespec="seconds"))
+                earned.add(rule.name)
+        self.store.update_challenges([(user, challenge.name, progress)
+                                      for challenge, progress in self.challenge_progress(user)])
+
+    def state(self, user):
+        """A copy of the user's state, safe to read while rows arrive."""
+        with self._lock:
+            return replace(self.states.get(user, UserState()))
+
+    def challenge_progress(self, user, today=None):
+        """[(Challenge, percent)] from the user's live state."""
+        state = self.state(user)
+        return [(c, c.progress(state.value(c.metric, today))) for c in self.challenges]
+
+    def achievement_status(self, user):
+        """[(Achievement, earned, percent towards threshold)] for display."""
+        with self._lock:
+            earned = set(self._earned_by(user))
+        state = self.state(user)
+        return [(a, a.name in earned, min(state.value(a.metric) / a.threshold, 1.0) * 100)
+                for a in self.achievements]
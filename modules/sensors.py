@@ -0,0 +1,566 @@
+"""Wearable sample ingestion for the live activity monitor.
+
+    python -m modules.sensors listen --source 127.0.0.1:8766
+    python -m modules.sensors replay --to 127.0.0.1:8766 --users 200 --speed 10
+    python -m modules.sensors replay --to file:samples.jsonl --as-user "Aswini Shetty"
+    python -m modules.sensors bench --users 1000
+
+Samples are JSON lines ``{"user": ..., "ts": <epoch seconds>, "heart_rate":
+<bpm>, "steps": <steps since the previous sample>}`` (or a JSON list of them
+per line) arriving on a TCP/unix socket or appended to a file. SensorHub
+keeps the last few minutes of each user's samples in fixed-size NumPy ring
+buffers and folds every batch into running state: an exponential moving
+average of heart rate, active calories, steps and seconds per heart-rate
+zone for the current day. Batches are applied with a few vectorized array
+operations, so ingestion stays far above the thousands of samples per second
+a busy process sees, and a dashboard read never rescans the stream.
+
+``replay`` turns exercise.csv sessions into 1 Hz samples, the test source
+for everything above.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+import zlib
+from itertools import islice
+
+import numpy as np
+
+from modules.data import EXERCISE_CSV, read_exercise
+from modules.net import parse_address
+
+DEFAULT_SOURCE = "127.0.0.1:8766"
+DEFAULT_CAPACITY = 600  # samples kept per user: 10 minutes at 1 Hz
+EMA_SECONDS = 30.0  # time constant of the heart-rate moving average
+MAX_GAP = 10.0  # longer gaps between samples are not counted as zone time
+ZONES = ("Rest", "Warm Up", "Fat Burn", "Cardio", "Threshold", "Peak")
+ZONE_EDGES = np.array([0.5, 0.6, 0.7, 0.8, 0.9])  # fractions of max heart rate
+DEFAULT_PROFILE = {"age": 30, "weight": 75.0, "gender": "Male"}
+
+
+def calories_per_minute(heart_rate, age, weight, female):
+    """Keytel et al. (2005) energy expenditure from heart rate, in kcal/min."""
+    kj = np.where(female,
+                  -20.4022 + 0.4472 * heart_rate - 0.1263 * weight + 0.074 * age,
+                  -55.0969 + 0.6309 * heart_rate + 0.1988 * weight + 0.2017 * age)
+    return np.maximum(kj / 4.184, 0.0)
+
+
+def _grow(array, rows, fill):
+    grown = np.full((rows,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class SensorHub:
+    """Per-user ring buffers and running stats for every streaming user.
+
+    Users are rows of a handful of shared arrays: ``ring[row]`` holds the
+    newest capacity (ts, heart_rate, steps) samples of one user, overwritten
+    oldest first, next to that user's running totals. A batch of samples
+    from any mix of users is applied in one pass of vectorized operations,
+    so the cost per batch does not grow with the number of users in it.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, initial_users=64):
+        self.capacity = capacity
+        self.rows = {}  # user -> row
+        self.samples = self.dropped = self.malformed = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._sources = []
+        self._followed = {}  # user -> last time a replay for them was asked for
+
+        n = initial_users
+        self.ring = np.zeros((n, 3, capacity))
+        self.written = np.zeros(n, dtype=np.int64)  # samples ever written per user
+        self.last_ts = np.full(n, -np.inf)
+        self.hr_ema = np.full(n, np.nan)
+        # Today's totals; day is the local day number they belong to
+        self.day = np.full(n, -1, dtype=np.int64)
+        self.steps = np.zeros(n)
+        self.active_calories = np.zeros(n)
+        self.zone_seconds = np.zeros((n, len(ZONES)))
+        self.age = np.full(n, float(DEFAULT_PROFILE["age"]))
+        self.weight = np.full(n, DEFAULT_PROFILE["weight"])
+        self.female = np.zeros(n, dtype=bool)
+
+    def _row(self, user):
+        """The user's row, allocating one (and growing the arrays) if needed."""
+        row = self.rows.get(user)
+        if row is None:
+            row = self.rows[user] = len(self.rows)
+            if row == len(self.written):
+                n = 2 * row
+                self.ring = _grow(self.ring, n, 0.0)
+                self.written = _grow(self.written, n, 0)
+                self.last_ts = _grow(self.last_ts, n, -np.inf)
+                self.hr_ema = _grow(self.hr_ema, n, np.nan)
+                self.day = _grow(self.day, n, -1)
+                self.steps = _grow(self.steps, n, 0.0)
+                self.active_calories = _grow(self.active_calories, n, 0.0)
+                self.zone_seconds = _grow(self.zone_seconds, n, 0.0)
+                self.age = _grow(self.age, n, float(DEFAULT_PROFILE["age"]))
+                self.weight = _grow(self.weight, n, DEFAULT_PROFILE["weight"])
+                self.female = _grow(self.female, n, False)
+        return row
+
+    def set_profile(self, user, age=None, weight=None, gender=None):
+        """Age, weight and gender used for the user's zones and calorie estimate."""
+        with self._lock:
+            row = self._row(user)
+            if age is not None:
+                self.age[row] = age
+            if weight is not None:
+                self.weight[row] = weight
+            if gender is not None:
+                self.female[row] = str(gender).lower() == "female"
+
+    def _zones(self, rows, heart_rate):
+        # Zone = number of zone edges (fractions of 220 - age) at or below the rate
+        max_hr = 220 - self.age[rows]
+        return (heart_rate[:, None] >= ZONE_EDGES * max_hr[:, None]).sum(axis=1)
+
+    def _apply(self, rows, ts, heart_rate, steps):
+        """Fold samples (parallel arrays, any users, any order) into the state."""
+        order = np.lexsort((ts, rows))
+        rows, ts, heart_rate, steps = rows[order], ts[order], heart_rate[order], steps[order]
+        # Drop samples at or before the user's last one (resends, clock skew)
+        repeated = np.zeros(len(ts), dtype=bool)
+        repeated[1:] = (rows[1:] == rows[:-1]) & (ts[1:] == ts[:-1])
+        keep = (ts > self.last_ts[rows]) & ~repeated
+        self.dropped += int(len(ts) - keep.sum())
+        rows, ts, heart_rate, steps = rows[keep], ts[keep], heart_rate[keep], steps[keep]
+        n = len(ts)
+        if not n:
+            return
+        self.samples += n
+
+        # Group the (sorted) samples by user
+        first = np.ones(n, dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+        starts = np.flatnonzero(first)
+        counts = np.diff(np.append(starts, n))
+        group = np.cumsum(first) - 1
+        users = rows[starts]
+        t_end = ts[starts + counts - 1]
+
+        previous = np.empty(n)
+        previous[1:] = ts[:-1]
+        previous[starts] = self.last_ts[users]
+        dt = ts - previous
+        dt[~np.isfinite(dt)] = 0.0  # a user's very first sample
+        counted = np.where(dt <= MAX_GAP, dt, 0.0)
+
+        # Today's totals: reset users whose newest sample starts a new local
+        # day, then only count samples from that day
+        offset = time.localtime(float(t_end.max())).tm_gmtoff
+        day = ((ts + offset) // 86400).astype(np.int64)
+        new_day = np.maximum(self.day[users], np.maximum.reduceat(day, starts))
+        reset = users[new_day > self.day[users]]
+        self.steps[reset] = 0.0
+        self.active_calories[reset] = 0.0
+        self.zone_seconds[reset] = 0.0
+        self.day[users] = new_day
+        today = day == self.day[rows]
+
+        zones = self._zones(rows, heart_rate)
+        rate = calories_per_minute(heart_rate, self.age[rows], self.weight[rows], self.female[rows])
+        np.add.at(self.zone_seconds, (rows[today], zones[today]), counted[today])
+        np.add.at(self.active_calories, rows[today],
+                  (rate * counted * (zones > 0) / 60)[today])
+        np.add.at(self.steps, rows[today], steps[today])
+
+        # Time-aware EMA of each user's batch in closed form: a sample enters
+        # with weight (1 - e^(-dt/tau)) and decays until the user's newest
+        # sample; the weights and the decayed old average sum to one
+        decay = np.exp(-(t_end[group] - ts) / EMA_SECONDS)
+        weights = (1 - np.exp(-dt / EMA_SECONDS)) * decay
+        old = self.hr_ema[users]
+        unseeded = np.isnan(old)
+        weights[starts[unseeded]] = decay[starts[unseeded]]  # first sample ever
+        carried = np.where(unseeded, 0.0,
+                           old * np.exp(-(t_end - self.last_ts[users]) / EMA_SECONDS))
+        self.hr_ema[users] = carried + np.bincount(group, weights * heart_rate,
+                                                   minlength=len(users))
+
+        # Ring buffers: only each user's newest capacity samples are written
+        rank = np.arange(n) - starts[group]
+        fits = rank >= counts[group] - self.capacity
+        positions = (self.written[rows] + rank) % self.capacity
+        self.ring[rows[fits], :, positions[fits]] = np.column_stack(
+            [ts, heart_rate, steps])[fits]
+        self.written[users] += counts
+        self.last_ts[users] = t_end
+
+    def extend(self, user, ts, heart_rate, steps):
+        """Add column arrays of samples for one user."""
+        ts = np.asarray(ts, dtype=float)
+        with self._lock:
+            rows = np.full(len(ts), self._row(user))
+            self._apply(rows, ts, np.asarray(heart_rate, dtype=float),
+                        np.asarray(steps, dtype=float))
+
+    def ingest(self, samples):
+        """Add sample dicts from any mix of users in one vectorized update."""
+        users, ts, heart_rate, steps = [], [], [], []
+        malformed = 0
+        for sample in samples:
+            try:
+                t, hr = float(sample["ts"]), float(sample["heart_rate"])
+                n_steps = float(sample.get("steps") or 0)
+                user = sample["user"]
+                hash(user)  # becomes a dict key in _row, under the lock
+            except (AttributeError, KeyError, TypeError, ValueError):
+                malformed += 1
+                continue
+            users.append(user)
+            ts.append(t)
+            heart_rate.append(hr)
+            steps.append(n_steps)
+        with self._lock:
+            self.malformed += malformed
+            if users:
+                row = self._row
+                rows = np.fromiter((row(user) for user in users), dtype=np.intp, count=len(users))
+                self._apply(rows, np.array(ts), np.array(heart_rate), np.array(steps, dtype=float))
+
+    def ingest_lines(self, lines):
+        """Parse JSON lines (one sample or a list of samples each) and ingest them."""
+        samples = []
+        malformed = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                parsed = json.loads(line)
+            except ValueError:
+                malformed += 1
+                continue
+            if isinstance(parsed, list):
+                samples.extend(parsed)
+            else:
+                samples.append(parsed)
+        if malformed:
+            with self._lock:
+                self.malformed += malformed
+        self.ingest(samples)
+
+    def snapshot(self, user, window=60.0, now=None):
+        """The user's current rolling stats, or None if they never streamed.
+
+        Heart-rate figures are None once no sample arrived for 30 seconds.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self.rows.get(user)
+            if row is None:
+                return None
+            held = min(self.written[row], self.capacity)
+            ring = self.ring[row].take(
+                np.arange(self.written[row] - held, self.written[row]) % self.capacity, axis=1)
+            last_ts, hr_ema = self.last_ts[row], self.hr_ema[row]
+            profile = (self.age[row], self.weight[row], self.female[row])
+            totals = (self.steps[row], self.active_calories[row], self.zone_seconds[row].copy())
+            today = self.day[row] == (now + time.localtime(now).tm_gmtoff) // 86400
+        ts, heart_rate, steps = ring
+        recent = ts >= now - window
+        live = now - last_ts <= MAX_GAP * 3
+        zone = self._zones(np.array([row]), np.array([hr_ema]))[0] if live else None
+        return {
+            "live": bool(live),
+            "last_sample_age": float(now - last_ts),
+            "heart_rate": round(float(hr_ema)) if live else None,
+            "heart_rate_min": float(heart_rate[recent].min()) if recent.any() else None,
+            "heart_rate_max": float(heart_rate[recent].max()) if recent.any() else None,
+            "zone": ZONES[zone] if live else None,
+            "calories_per_minute": float(calories_per_minute(hr_ema, *profile)) if live else 0.0,
+            "steps_per_minute": float(steps[recent].sum() * 60 / window),
+            "active_calories": float(totals[1]) if today else 0.0,
+            "steps": int(totals[0]) if today else 0,
+            "zone_minutes": dict(zip(ZONES, (totals[2] / 60 * today).round(1).tolist())),
+        }
+
+    def stats(self):
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {"users": len(self.rows), "samples": self.samples, "dropped": self.dropped,
+                    "malformed": self.malformed,
+                    "samples_per_second": round(self.samples / elapsed, 1) if elapsed else None,
+                    "sources": [name for name, _ in self._sources]}
+
+    def start(self, source):
+        """Start a daemon thread feeding the hub from source; returns self.
+
+        source is host:port or unix:/path (listen for JSON lines), file:/path
+        (tail a JSON-lines file), or "replay" (follow() simulates users from
+        exercise.csv in real time).
+        """
+        if source == "replay":
+            self._sources.append((source, None))
+            return self
+        if source.startswith("file:"):
+            target, args = tail_file, (self, source[len("file:"):])
+        else:
+            target, args = serve_forever, (self, source)
+        thread = threading.Thread(target=target, args=args, daemon=True,
+                                  name=f"sensors-{source}")
+        thread.start()
+        self._sources.append((source, thread))
+        return self
+
+    def follow(self, user, backfill=300.0, idle_timeout=600.0):
+        """With a replay source, keep a simulated stream running for user.
+
+        The last backfill seconds are ingested before returning, in one batch;
+        the stream stops once nobody has asked for it for idle_timeout seconds.
+        """
+        if not any(name == "replay" for name, _ in self._sources):
+            return
+        with self._lock:
+            running = user in self._followed
+            self._followed[user] = time.monotonic()
+        if running:
+            return
+
+        ticks = replay(as_user=user, start=time.time() - backfill, seed=zlib.crc32(user.encode()))
+        now = time.time()
+        past = []
+        for tick in ticks:
+            past.extend(tick)
+            if tick[0]["ts"] >= now:
+                break
+        self.ingest(past)
+
+        def run():
+            for tick in pace(ticks):
+                self.ingest(tick)
+                with self._lock:
+                    if time.monotonic() - self._followed[user] > idle_timeout:
+                        del self._followed[user]
+                        return
+
+        threading.Thread(target=run, daemon=True, name=f"sensors-replay-{user}").start()
+
+
+async def _serve(hub, address, ready=None):
+    async def handle(reader, writer):
+        pending = b""
+        try:
+            # Read whatever has arrived and ingest every complete line at once
+            while chunk := await reader.read(1 << 16):
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                hub.ingest_lines(lines)
+            hub.ingest_lines([pending])
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    kind, where = parse_address(address)
+    if kind == "unix":
+        if os.path.exists(where):
+            os.remove(where)
+        server = await asyncio.start_unix_server(handle, path=where)
+    else:
+        server = await asyncio.start_server(handle, *where)
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+def serve_forever(hub, address=DEFAULT_SOURCE, ready=None):
+    """Accept JSON-lines connections on address and feed every sample to hub."""
+    asyncio.run(_serve(hub, address, ready))
+
+
+def tail_file(hub, path, poll=0.25, from_start=True):
+    """Follow a JSON-lines file (like ``tail -f``), ingesting lines as they are appended."""
+    while not os.path.exists(path):
+        time.sleep(poll)
+    with open(path, "rb") as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        pending = b""
+        while True:
+            chunk = f.read(1 << 16)
+            if not chunk:
+                if os.path.getsize(path) < f.tell():
+                    f.seek(0)  # truncated or rotated in place
+                    pending = b""
+                time.sleep(poll)
+                continue
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            hub.ingest_lines(lines)
+
+
+def replay(path=EXERCISE_CSV, users=1, as_user=None, start=None, hz=1.0, seed=0):
+    """Endless ticks of simulated wearable samples built from exercise.csv.
+
+    Each exercise.csv row becomes a session of Duration minutes whose heart
+    rate warms up from rest to the row's Heart_Rate and then wanders around
+    it; steps follow heart rate. users sessions run side by side, each
+    taking the next row when it finishes. Yields one list of sample dicts
+    per tick (1/hz seconds of simulated time, starting at start).
+    """
+    rng = np.random.default_rng(seed)
+    sessions = read_exercise(path, usecols=["User_ID", "Duration", "Heart_Rate"])
+    sessions = sessions.sample(frac=1, random_state=seed).to_numpy(dtype=float)
+    step = 1.0 / hz
+    ts = time.time() if start is None else start
+    next_row = 0
+
+    def new_session(slot):
+        nonlocal next_row
+        user_id, minutes, target = sessions[next_row % len(sessions)]
+        next_row += 1
+        name = as_user if as_user is not None else str(int(user_id))
+        if users > 1 and as_user is not None:
+            name = f"{as_user}-{slot}"
+        return {"user": name, "left": minutes * 60 * hz, "elapsed": 0.0,
+                "target": target, "rest": rng.uniform(60, 80), "hr": None}
+
+    slots = [new_session(i) for i in range(users)]
+    while True:
+        tick = []
+        for i, session in enumerate(slots):
+            if session["left"] <= 0:
+                session = slots[i] = new_session(i)
+            warm = min(session["elapsed"] / 120.0, 1.0)
+            goal = session["rest"] + (session["target"] - session["rest"]) * warm
+            hr = goal if session["hr"] is None else session["hr"] + 0.3 * (goal - session["hr"])
+            session["hr"] = hr + rng.normal(0, 1.5)
+            cadence = max(session["hr"] - 90, 0) / 60 * 2.5  # steps per second
+            tick.append({"user": session["user"], "ts": round(ts, 3),
+                         "heart_rate": round(session["hr"], 1),
+                         "steps": int(rng.poisson(cadence * step))})
+            session["elapsed"] += step
+            session["left"] -= 1
+        yield tick
+        ts += step
+
+
+def pace(ticks, speed=1.0):
+    """Yield each tick at its timestamp, with time from now on running speed
+    times faster; ticks stamped in the past (a backfill) pass straight through.
+    """
+    origin = time.time()
+    for tick in ticks:
+        delay = origin + (tick[0]["ts"] - origin) / speed - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        yield tick
+
+
+def _send(target, ticks, batch_ticks):
+    """Write ticks as JSON lines to a socket address or a file path."""
+    if target.startswith("file:"):
+        out = open(target[len("file:"):], "a")
+        write, close = out.write, out.close
+    else:
+        kind, where = parse_address(target)
+        if kind == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(where)
+        else:
+            sock = socket.create_connection(where)
+        write, close = (lambda text: sock.sendall(text.encode())), sock.close
+    sent = 0
+    buffered = []
+    try:
+        for tick in ticks:
+            buffered.append(json.dumps(tick))
+            sent += len(tick)
+            if len(buffered) >= batch_ticks:
+                write("\n".join(buffered) + "\n")
+                buffered = []
+        if buffered:
+            write("\n".join(buffered) + "\n")
+    finally:
+        close()
+    return sent
+
+
+def bench(users=1000, seconds=60):
+    """Samples per second through SensorHub.ingest and ingest_lines (single thread)."""
+    ticks = list(islice(replay(users=users, start=time.time() - seconds), seconds))
+    lines = [json.dumps(sample).encode() for tick in ticks for sample in tick]
+    n = len(lines)
+    hub = SensorHub()
+    start = time.perf_counter()
+    for tick in ticks:
+        hub.ingest(tick)
+    dicts = n / (time.perf_counter() - start)
+    hub = SensorHub()
+    start = time.perf_counter()
+    for i in range(0, n, users):
+        hub.ingest_lines(lines[i:i + users])
+    parsed = n / (time.perf_counter() - start)
+    return {"samples": n, "users": users, "ingest_per_second": round(dicts),
+            "ingest_lines_per_second": round(parsed)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wearable sample streaming")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    listen = commands.add_parser("listen", help="ingest a source and print rolling stats")
+    listen.add_argument("--source", default=DEFAULT_SOURCE,
+                        help="host:port, unix:/path or file:/path")
+    listen.add_argument("--user", help="also print this user's snapshot")
+
+    send = commands.add_parser("replay", help="send simulated samples from exercise.csv")
+    send.add_argument("--to", default=DEFAULT_SOURCE,
+                      help="host:port, unix:/path or file:/path")
+    send.add_argument("--users", type=int, default=10, help="concurrent sessions")
+    send.add_argument("--as-user", help="name the sessions after this user")
+    send.add_argument("--speed", type=float, default=1.0, help="0 sends as fast as possible")
+    send.add_argument("--seconds", type=float, help="stop after this much simulated time")
+    send.add_argument("--backfill", type=float, default=0.0,
+                      help="start this many seconds in the past")
+
+    measure = commands.add_parser("bench", help="measure single-thread ingest throughput")
+    measure.add_argument("--users", type=int, default=1000)
+    measure.add_argument("--seconds", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        for key, value in bench(args.users, args.seconds).items():
+            print(f"{key:>24}: {value}")
+        return
+
+    if args.command == "replay":
+        ticks = replay(users=args.users, as_user=args.as_user,
+                       start=time.time() - args.backfill)
+        if args.seconds is not None:
+            ticks = islice(ticks, int(args.seconds))
+        if args.speed > 0:
+            ticks = pace(ticks, args.speed)
+        try:
+            sent = _send(args.to, ticks, batch_ticks=1 if args.speed > 0 else 100)
+        except KeyboardInterrupt:
+            return
+        print(f"Sent {sent} samples to {args.to}")
+        return
+
+    hub = SensorHub().start(args.source)
+    print(f"Listening on {args.source}")
+    try:
+        while True:
+            time.sleep(1)
+            print(json.dumps(hub.stats()))
+            if args.user:
+                print(json.dumps(hub.snapshot(args.user)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""Local prediction server that micro-batches concurrent requests.
+
+    python -m modules.serving --address 127.0.0.1:8765 --workers 2
+    python -m modules.serving --address unix:/tmp/fitmetrics.sock
+
+The protocol is one JSON object per line in each direction. Requests are
+``{"op": "predict", "rows": [[...FEATURES...], ...]}`` (or ``"inputs"``, a
+mapping of exercise.csv columns to lists), ``{"op": "info"}`` and
+``{"op": "stats"}``. An asyncio front end queues incoming rows and every few
+milliseconds stacks whatever has arrived into one matrix for a process-pool
+worker, so many dashboard sessions cost a few forest walks instead of one
+each, and none of it runs under the Streamlit server's GIL.
+
+PredictionClient is what app.py uses: a small pool of persistent
+connections, falling back to an in-process model when the server is down.
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from modules.features import build_features
+from modules.lazy import lazy_import
+from modules.net import parse_address
+from modules.profiling import LatencyRecorder
+
+# Only the server needs scikit-learn; clients stay light
+ml_models = lazy_import("modules.ml_models")
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+DEFAULT_WINDOW_MS = 3.0
+DEFAULT_MAX_BATCH = 256
+
+_worker_model = None
+
+
+def _init_worker(model_path):
+    global _worker_model
+    _worker_model = ml_models.load_model(model_path, mmap_mode="r")
+
+
+def _predict(X):
+    return _worker_model.predict(X)
+
+
+class MicroBatcher:
+    """Collects concurrent requests for up to window_ms and predicts them together."""
+
+    def __init__(self, predict, window_ms=DEFAULT_WINDOW_MS, max_batch=DEFAULT_MAX_BATCH,
+                 max_in_flight=2):
+        self.predict = predict  # coroutine function: (n, k) array -> (n,) array
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.requests = self.rows = self.batches = 0
+        self.recent_batch_rows = deque(maxlen=1024)
+        self.latency = LatencyRecorder(capacity=2048)
+
+    async def submit(self, X):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((X, future, time.perf_counter()))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            rows = len(batch[0][0])
+            deadline = loop.time() + self.window
+            while rows < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+            # Bounded in-flight batches: later requests wait in the queue
+            await self._slots.acquire()
+            asyncio.create_task(self._dispatch(batch, rows))
+
+    async def _dispatch(self, batch, rows):
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            for _, _, queued_at in batch:
+                self.latency.record("queue_wait", start - queued_at)
+            predictions = await self.predict(np.vstack([X for X, _, _ in batch]))
+            offset = 0
+            for X, future, _ in batch:
+                if not future.done():
+                    future.set_result(predictions[offset:offset + len(X)])
+                offset += len(X)
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            self.latency.record("batch", time.perf_counter() - start)
+            self.in_flight -= 1
+            self.requests += len(batch)
+            self.rows += rows
+            self.batches += 1
+            self.recent_batch_rows.append(rows)
+            self._slots.release()
+
+    def stats(self):
+        recent = np.asarray(self.recent_batch_rows or [0])
+        return {
+            "queue_depth": self.queue.qsize(),
+            "in_flight_batches": self.in_flight,
+            "requests": self.requests,
+            "rows": self.rows,
+            "batches": self.batches,
+            "batch_rows_mean": round(float(recent.mean()), 2),
+            "batch_rows_max": int(recent.max()),
+            "latency": self.latency.summary(),
+        }
+
+
+class PredictionServer:
+    def __init__(self, model_path=None, workers=1, window_ms=DEFAULT_WINDOW_MS,
+                 max_batch=DEFAULT_MAX_BATCH):
+        self.model_path = model_path or ml_models.latest_model_path()
+        if self.model_path is None:
+            raise FileNotFoundError("No trained model found; run `python -m modules.train`")
+        with open(os.path.join(self.model_path, "schema.json")) as f:
+            schema = json.load(f)
+        self.info = {"version": schema["version"], "features": schema["features"],
+                     "metrics": schema["metrics"]}
+        self.workers = workers
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.executor = None
+        self.batcher = None
+        self.pool_restarts = 0
+
+    def _start_pool(self):
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(self.model_path,))
+
+    async def _predict(self, X):
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, _predict, X)
+        except BrokenProcessPool:
+            # A worker died (OOM kill, segfault) and took the whole pool with it;
+            # the first batch to notice replaces it, every failed batch retries once
+            if self.executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._start_pool()
+                self.pool_restarts += 1
+            return await loop.run_in_executor(self.executor, _predict, X)
+
+    async def _respond(self, request):
+        op = request.get("op", "predict")
+        if op == "predict":
+            if "inputs" in request:
+                X = build_features(request["inputs"])
+            else:
+                X = np.asarray(request["rows"], dtype=float).reshape(-1, len(self.info["features"]))
+            predictions = await self.batcher.submit(X)
+            return {"predictions": predictions.tolist(), "version": self.info["version"]}
+        if op == "info":
+            return self.info
+        if op == "stats":
+            return {**self.batcher.stats(), "pool_restarts": self.pool_restarts}
+        raise ValueError(f"Unknown op: {op!r}")
+
+    async def handle(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    response = await self._respond(json.loads(line))
+                except Exception as exc:
+                    response = {"error": f"{type(exc).__name__}: {exc}"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address=DEFAULT_ADDRESS, ready=None):
+        self._start_pool()
+        # Load the model in every worker before accepting traffic
+        await asyncio.gather(*(self._predict(np.zeros((1, len(self.info["features"]))))
+                               for _ in range(self.workers)))
+        self.batcher = MicroBatcher(self._predict, self.window_ms, self.max_batch,
+                                    max_in_flight=self.workers + 1)
+        kind, where = parse_address(address)
+        if kind == "unix":
+            if os.path.exists(where):
+                os.remove(where)
+            server = await asyncio.start_unix_server(self.handle, path=where)
+        else:
+            server = await asyncio.start_server(self.handle, *where)
+        batcher_task = asyncio.create_task(self.batcher.run())
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher_task.cancel()
+            self.executor.shutdown(cancel_futures=True)
+
+
+class ServerError(RuntimeError):
+    """The server answered a request with {"error": ...}."""
+
+
+class PredictionClient:
+    """Thread-safe client with persistent connections and an in-process fallback.
+
+    fallback is a zero-argument callable returning a CalorieModel; it is only
+    called when the server cannot be reached or answers a request with an
+    error. Only a transport failure stops the client from trying the server
+    for the next retry_after seconds.
+    version and metrics are re-read from the server every info_ttl seconds,
+    and at once when a prediction comes back from a different version.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, pool_size=4, timeout=1.0, fallback=None,
+                 retry_after=5.0, info_ttl=30.0):
+        self.address = parse_address(address)
+        self.timeout = timeout
+        self.fallback = fallback
+        self.retry_after = retry_after
+        self.info_ttl = info_ttl
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._down_until = 0.0
+        self._info = None
+        self._info_at = 0.0
+        self._lock = threading.Lock()
+        self.served = self.fallbacks = 0
+
+    def _connect(self):
+        kind, where = self.address
+        if kind == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(where)
+        else:
+            sock = socket.create_connection(where, timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock, sock.makefile("rb")
+
+    def _request(self, payload):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        sock, reader = conn
+        try:
+            sock.sendall(json.dumps(payload).encode() + b"\n")
+            line = reader.readline()
+            if not line:
+                raise ConnectionError("prediction server closed the connection")
+            response = json.loads(line)
+        except BaseException:
+            sock.close()
+            raise
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            sock.close()
+        if "error" in response:
+            raise ServerError(response["error"])
+        return response
+
+    def _call(self, payload):
+        """Server response, or None when the server is (recently) unreachable or failing."""
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            return self._request(payload)
+        except ServerError:
+            # One bad request; the server itself is fine for everyone else
+            return None
+        except (OSError, ValueError):
+            self._down_until = time.monotonic() + self.retry_after
+            return None
+
+    def _fallback_model(self):
+        if self.fallback is None:
+            raise ConnectionError("prediction server unavailable and no fallback configured")
+        return self.fallback()
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=float)
+        response = self._call({"op": "predict", "rows": X.tolist()})
+        with self._lock:
+            if response is None:
+                self.fallbacks += 1
+            else:
+                self.served += 1
+        if response is None:
+            return self._fallback_model().predict(X)
+        info = self._info
+        if info is not None and response.get("version") != info["version"]:
+            self._info = None  # the server moved to a new model; metrics are stale too
+        return np.asarray(response["predictions"])
+
+    def predict_one(self, age, weight, height, duration, heart_rate, gender):
+        """Same contract as CalorieModel.predict_one: (kcal, latency_ms)."""
+        start = time.perf_counter()
+        row = build_features({"Gender": [gender], "Age": [age], "Height": [height],
+                              "Weight": [weight], "Duration": [duration],
+                              "Heart_Rate": [heart_rate]})
+        kcal = float(self.predict(row)[0])
+        return kcal, (time.perf_counter() - start) * 1000
+
+    def _model_info(self):
+        now = time.monotonic()
+        if self._info is None or now - self._info_at > self.info_ttl:
+            self._info = self._call({"op": "info"})
+            self._info_at = now
+        return self._info
+
+    @property
+    def metrics(self):
+        info = self._model_info()
+        return info["metrics"] if info else self._fallback_model().metrics
+
+    @property
+    def version(self):
+        info = self._model_info()
+        return info["version"] if info else self._fallback_model().version
+
+    def stats(self):
+        """Server queue/batch stats plus this client's served/fallback counts."""
+        return {"server": self._call({"op": "stats"}), "served": self.served,
+                "fallbacks": self.fallbacks}
+
+    def close(self):
+        while True:
+            try:
+                sock, _ = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve calorie predictions with micro-batching")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="host:port or unix:/path")
+    parser.add_argument("--model", help="artifact directory (default: models/LATEST)")
+    parser.add_argument("--workers", type=int, default=1, help="prediction processes")
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_MS,
+                        help="how long to collect requests into one batch")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    args = parser.parse_args(argv)
+
+    server = PredictionServer(args.model, args.workers, args.window_ms, args.max_batch)
+    print(f"Serving {server.info['version']} on {args.address} "
+          f"({args.workers} workers, {args.window_ms} ms window)")
+    try:
+        asyncio.run(server.serve(args.address))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
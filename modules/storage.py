@@ -0,0 +1,299 @@
+"""SQLite-backed store for workouts, nutrition, achievements and challenges.
+
+Replaces the per-session lists in st.session_state. One FitnessStore is
+shared by every session in the server process: it keeps a small pool of
+WAL-mode connections (readers never block the writer), buffers single-row
+writes into batched transactions, and pages through history with keyset
+pagination so the dashboard only loads the rows it renders. Queued rows
+are flushed when the process exits.
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import pandas as pd
+
+from modules import rollups
+from modules.data import ROOT
+
+DB_PATH = os.path.join(ROOT, "data", "fitness.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workouts (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    day TEXT NOT NULL,
+    logged_at TEXT NOT NULL,
+    workout_type TEXT,
+    duration_min REAL,
+    calories REAL,
+    steps INTEGER,
+    heart_rate REAL
+);
+CREATE INDEX IF NOT EXISTS workouts_user_day ON workouts (user, day, id);
+
+CREATE TABLE IF NOT EXISTS nutrition (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    day TEXT NOT NULL,
+    logged_at TEXT NOT NULL,
+    water_ml REAL DEFAULT 0,
+    protein_g REAL DEFAULT 0,
+    carbs_g REAL DEFAULT 0,
+    fat_g REAL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS nutrition_user_day ON nutrition (user, day, id);
+
+CREATE TABLE IF NOT EXISTS achievements (
+    user TEXT NOT NULL,
+    name TEXT NOT NULL,
+    earned_at TEXT NOT NULL,
+    PRIMARY KEY (user, name)
+);
+
+CREATE TABLE IF NOT EXISTS challenges (
+    user TEXT NOT NULL,
+    name TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    target REAL NOT NULL,
+    PRIMARY KEY (user, name)
+);
+"""
+
+WORKOUT_COLUMNS = ["user", "day", "logged_at", "workout_type", "duration_min",
+                   "calories", "steps", "heart_rate"]
+NUTRITION_COLUMNS = ["user", "day", "logged_at", "water_ml", "protein_g", "carbs_g", "fat_g"]
+
+
+@dataclass
+class Page:
+    rows: list
+    next_cursor: tuple = None  # pass back as ``before`` to get the next page
+
+
+class ConnectionPool:
+    """Fixed set of sqlite3 connections handed out to one thread at a time."""
+
+    def __init__(self, path, size=4):
+        self._pool = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._pool.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+def _stamp(row):
+    now = datetime.now()
+    row.setdefault("logged_at", now.isoformat(timespec="seconds"))
+    day = row.get("day") or now.date()
+    row["day"] = day.isoformat() if isinstance(day, date) else str(day)
+    return row
+
+
+class FitnessStore:
+    def __init__(self, path=DB_PATH, pool_size=4, batch_size=50):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.pool = ConnectionPool(path, pool_size)
+        self.batch_size = batch_size
+        self._pending = {"workouts": [], "nutrition": []}
+        self._lock = threading.Lock()
+        # Held while a batch is written and its listeners run. Reads flush
+        # first, so they wait for an in-progress write instead of missing it;
+        # re-entrant because listeners read the store too.
+        self.write_lock = threading.RLock()
+        self._listeners = []
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA + rollups.SCHEMA)
+            empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM rollups)").fetchone()[0]
+            if empty:
+                # Databases created before rollups existed get backfilled once
+                with conn:
+                    rollups.rebuild(conn)
+        atexit.register(self.flush)
+
+    # -- writes -------------------------------------------------------------
+
+    def subscribe(self, callback):
+        """Call callback(table, rows) after every committed batch of rows.
+
+        Lets derived state (leaderboards, achievements) update per event
+        instead of re-reading history.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, table, rows):
+        for callback in self._listeners:
+            callback(table, rows)
+
+    def _insert_many(self, conn, table, columns, rows):
+        placeholders = ", ".join("?" for _ in columns)
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            [tuple(row.get(col) for col in columns) for row in rows],
+        )
+
+    def add_workouts(self, rows):
+        """Insert workout dicts and update their rollups in one transaction."""
+        rows = [_stamp(dict(row)) for row in rows]
+        with self.write_lock:
+            with self.pool.connection() as conn, conn:
+                self._insert_many(conn, "workouts", WORKOUT_COLUMNS, rows)
+                rollups.apply(conn, rows)
+            self._notify("workouts", rows)
+
+    def add_nutrition(self, rows):
+        rows = [_stamp(dict(row)) for row in rows]
+        with self.write_lock:
+            with self.pool.connection() as conn, conn:
+                self._insert_many(conn, "nutrition", NUTRITION_COLUMNS, rows)
+            self._notify("nutrition", rows)
+
+    def log_workout(self, **row):
+        """Queue one workout; written with others once batch_size accumulate."""
+        self._queue("workouts", row)
+
+    def log_nutrition(self, **row):
+        self._queue("nutrition", row)
+
+    def _queue(self, table, row):
+        with self._lock:
+            self._pending[table].append(_stamp(row))
+            full = len(self._pending[table]) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self.write_lock:
+            with self._lock:
+                workouts, self._pending["workouts"] = self._pending["workouts"], []
+                nutrition, self._pending["nutrition"] = self._pending["nutrition"], []
+            if workouts:
+                self.add_workouts(workouts)
+            if nutrition:
+                self.add_nutrition(nutrition)
+
+    # -- reads --------------------------------------------------------------
+
+    def _page(self, table, user, start, end, limit, before):
+        # Reads see queued writes from this process
+        self.flush()
+        clauses, params = ["user = ?"], [user]
+        if start is not None:
+            clauses.append("day >= ?")
+            params.append(str(start))
+        if end is not None:
+            clauses.append("day <= ?")
+            params.append(str(end))
+        if before is not None:
+            clauses.append("(day, id) < (?, ?)")
+            params.extend(before)
+        sql = (f"SELECT * FROM {table} WHERE {' AND '.join(clauses)} "
+               f"ORDER BY day DESC, id DESC LIMIT ?")
+        with self.pool.connection() as conn:
+            rows = [dict(r) for r in conn.execute(sql, params + [limit])]
+        cursor = (rows[-1]["day"], rows[-1]["id"]) if len(rows) == limit else None
+        return Page(rows, cursor)
+
+    def workouts(self, user, start=None, end=None, limit=20, before=None):
+        """Newest-first page of a user's workouts within [start, end]."""
+        return self._page("workouts", user, start, end, limit, before)
+
+    def nutrition(self, user, start=None, end=None, limit=20, before=None):
+        return self._page("nutrition", user, start, end, limit, before)
+
+    def water_today(self, user, day=None):
+        self.flush()
+        day = (day or date.today()).isoformat()
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT COALESCE(SUM(water_ml), 0) FROM nutrition WHERE user = ? AND day = ?",
+                (user, day)).fetchone()
+        return row[0]
+
+    def rollup(self, user, period="day", start=None, end=None):
+        """Pre-aggregated workout totals per day/week/month (see modules.rollups)."""
+        self.flush()
+        with self.pool.connection() as conn:
+            return rollups.series(conn, user, period, start, end)
+
+    def daily_window(self, user, days=7, end=None):
+        self.flush()
+        with self.pool.connection() as conn:
+            return rollups.daily_window(conn, user, days, end)
+
+    def history(self, table, user=None):
+        """All workouts or nutrition rows (optionally one user's), oldest first."""
+        if table not in ("workouts", "nutrition"):
+            raise ValueError(f"Unknown table: {table!r}")
+        self.flush()
+        where, params = ("WHERE user = ?", [user]) if user else ("", [])
+        with self.pool.connection() as conn:
+            return pd.read_sql_query(f"SELECT * FROM {table} {where} ORDER BY day, id",
+                                     conn, params=params)
+
+    def period_totals(self, period, bucket, column="calories"):
+        """Every user's rollup total for one day/week/month bucket."""
+        self.flush()
+        with self.pool.connection() as conn:
+            return [tuple(row) for row in rollups.totals(conn, period, bucket, column)]
+
+    # -- achievements & challenges -------------------------------------------
+
+    def award(self, user, name, earned_at=None):
+        earned_at = earned_at or datetime.now().isoformat(timespec="seconds")
+        with self.pool.connection() as conn, conn:
+            conn.execute("INSERT OR IGNORE INTO achievements VALUES (?, ?, ?)",
+                         (user, name, earned_at))
+
+    def achievements(self, user):
+        with self.pool.connection() as conn:
+            return [dict(r) for r in conn.execute(
+                "SELECT name, earned_at FROM achievements WHERE user = ? ORDER BY earned_at",
+                (user,))]
+
+    def seed_challenges(self, user, challenges):
+        """Create the given challenges for user unless they already exist."""
+        with self.pool.connection() as conn, conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO challenges (user, name, progress, target) "
+                "VALUES (?, ?, ?, ?)",
+                [(user, c["name"], c["progress"], c["target"]) for c in challenges])
+
+    def set_challenge_progress(self, user, name, progress):
+        self.update_challenges([(user, name, progress)])
+
+    def update_challenges(self, updates):
+        """Set progress for many (user, name, progress) tuples in one transaction."""
+        with self.pool.connection() as conn, conn:
+            conn.executemany("UPDATE challenges SET progress = ? WHERE user = ? AND name = ?",
+                             [(progress, user, name) for user, name, progress in updates])
+
+    def challenges(self, user):
+        with self.pool.connection() as conn:
+            return [dict(r) for r in conn.execute(
+                "SELECT name, progress, target FROM challenges WHERE user = ? ORDER BY rowid",
+                (user,))]
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        self.pool.close()
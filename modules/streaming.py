@@ -0,0 +1,217 @@
+"""Chunked ingestion for exercise logs too large to merge in memory.
+
+Instead of ``exercise.merge(calories, on="User_ID").drop_duplicates()`` over
+two full tables, exercise rows are read ``chunksize`` at a time, joined
+against a sorted User_ID index of calories.csv, deduplicated through a set
+of 64-bit row fingerprints, and turned into model-ready feature batches.
+Peak memory is one chunk plus the index and 8 bytes per distinct row seen.
+
+Both files go through modules.validation chunk by chunk on the way in.
+User_IDs repeated across chunks with different values are caught with a
+second fingerprint set (8 more bytes per row); the first row seen is kept,
+as within a chunk, so the output does not depend on the chunk size. Without
+dedupe (scoring) IDs may repeat and every valid row is emitted.
+"""
+import os
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from modules.data import CALORIES_CSV, EXERCISE_CSV, read_calories, read_exercise
+from modules.features import build_features
+from modules.ml_models import TARGET
+from modules import validation
+from modules.validation import MAX_BAD_FRACTION, QUARANTINE_DIR
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class CaloriesIndex:
+    """Sorted User_ID -> Calories lookup, built once and probed per chunk."""
+
+    def __init__(self, user_ids, calories):
+        order = np.argsort(user_ids, kind="stable")
+        self.user_ids = np.asarray(user_ids)[order]
+        self.calories = np.asarray(calories, dtype=np.float32)[order]
+
+    @classmethod
+    def from_csv(cls, path=CALORIES_CSV, chunksize=DEFAULT_CHUNKSIZE, validate=True,
+                 max_bad_fraction=MAX_BAD_FRACTION, quarantine_dir=QUARANTINE_DIR):
+        ids, values = [], []
+        for chunk in _read_chunks(path, "calories", chunksize, validate, max_bad_fraction,
+                                  quarantine_dir):
+            ids.append(chunk["User_ID"].to_numpy())
+            values.append(chunk["Calories"].to_numpy())
+        return cls(np.concatenate(ids), np.concatenate(values))
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def lookup(self, user_ids):
+        """Return (calories, found) for each id; unmatched rows get NaN."""
+        user_ids = np.asarray(user_ids)
+        if not len(self.user_ids):
+            return np.full(len(user_ids), np.nan, np.float32), np.zeros(len(user_ids), bool)
+        pos = np.searchsorted(self.user_ids, user_ids)
+        pos[pos == len(self.user_ids)] = 0
+        found = self.user_ids[pos] == user_ids
+        return np.where(found, self.calories[pos], np.nan).astype(np.float32), found
+
+
+class RowHashSet:
+    """Set of uint64 row fingerprints stored as a few sorted runs.
+
+    New fingerprints are appended as a sorted run and neighbouring runs are
+    merged whenever the newer one has grown to half the older one, so there
+    are O(log n) runs to probe and each fingerprint is re-sorted O(log n) times.
+    """
+
+    def __init__(self):
+        self._runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    @property
+    def nbytes(self):
+        return sum(run.nbytes for run in self._runs)
+
+    def contains(self, hashes):
+        seen = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            pos = np.searchsorted(run, hashes)
+            pos[pos == len(run)] = len(run) - 1
+            seen |= run[pos] == hashes
+        return seen
+
+    def add_new(self, hashes):
+        """Insert hashes and return a mask of the ones not seen before.
+
+        Only the first occurrence of a fingerprint repeated within ``hashes``
+        is reported as new, matching DataFrame.drop_duplicates(keep="first").
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        new = np.zeros(len(hashes), dtype=bool)
+        unique, first = np.unique(hashes, return_index=True)
+        fresh = ~self.contains(unique)
+        new[first[fresh]] = True
+        if fresh.any():
+            self._runs.append(unique[fresh])
+            while len(self._runs) > 1 and 2 * len(self._runs[-1]) >= len(self._runs[-2]):
+                newer = self._runs.pop()
+                older = self._runs.pop()
+                self._runs.append(np.sort(np.concatenate([older, newer]), kind="mergesort"))
+        return new
+
+
+@dataclass
+class StreamStats:
+    chunks: int = 0
+    rows_read: int = 0
+    rows_unmatched: int = 0
+    rows_duplicate: int = 0
+    rows_quarantined: int = 0
+    rows_emitted: int = 0
+    dedupe_bytes: int = 0
+    quarantine_path: str = None
+
+
+@dataclass
+class FeatureBatch:
+    user_ids: np.ndarray
+    X: np.ndarray
+    y: np.ndarray = None  # None when streaming without calories (scoring)
+    frame: pd.DataFrame = field(default=None, repr=False)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+
+def _read_chunks(path, table, chunksize, validate=True, max_bad_fraction=MAX_BAD_FRACTION,
+                 quarantine_dir=QUARANTINE_DIR, report=None, dedupe=True):
+    """Typed chunks of a table, validated (and bad rows quarantined) when asked.
+
+    With dedupe unset, exact duplicate rows and repeated User_IDs are kept.
+    """
+    if not validate:
+        reader = read_exercise if table == "exercise" else read_calories
+        yield from reader(path, chunksize=chunksize)
+        return
+    if report is None:
+        report = validation.ValidationReport(table, os.path.abspath(path))
+    try:
+        for raw, tokens in validation.iter_raw(path, table, chunksize):
+            chunk, _ = validation.validate(raw, table, report, tokens, max_bad_fraction,
+                                           quarantine_dir, drop_duplicates=dedupe,
+                                           unique_ids=dedupe)
+            yield chunk
+    finally:
+        report.save(quarantine_dir)
+
+
+def iter_joined_chunks(exercise_path=EXERCISE_CSV, calories=CALORIES_CSV,
+                       chunksize=DEFAULT_CHUNKSIZE, dedupe=True, stats=None, validate=True,
+                       max_bad_fraction=MAX_BAD_FRACTION, quarantine_dir=QUARANTINE_DIR):
+    """Yield joined, deduplicated DataFrame chunks in file order.
+
+    ``calories`` may be a path, a prebuilt CaloriesIndex, or None to stream
+    the exercise rows alone (for scoring files without labels). With
+    validate set, a file failing validation raises DataQualityError mid-stream.
+    """
+    if isinstance(calories, str):
+        calories = CaloriesIndex.from_csv(calories, chunksize, validate, max_bad_fraction,
+                                          quarantine_dir)
+    stats = stats if stats is not None else StreamStats()
+    seen = RowHashSet() if dedupe else None
+    report = validation.ValidationReport("exercise", os.path.abspath(exercise_path))
+    seen_ids = RowHashSet() if validate and dedupe else None
+
+    for chunk in _read_chunks(exercise_path, "exercise", chunksize, validate, max_bad_fraction,
+                              quarantine_dir, report, dedupe):
+        stats.chunks += 1
+        stats.rows_read = report.rows if validate else stats.rows_read + len(chunk)
+        if calories is not None:
+            values, found = calories.lookup(chunk["User_ID"].to_numpy())
+            stats.rows_unmatched += int((~found).sum())
+            chunk = chunk.loc[found].assign(**{TARGET: values[found]})
+        if seen is not None and len(chunk):
+            fingerprints = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+            keep = seen.add_new(fingerprints)
+            stats.rows_duplicate += int((~keep).sum())
+            chunk = chunk.loc[keep]
+        if seen_ids is not None and len(chunk):
+            first = seen_ids.add_new(chunk["User_ID"].to_numpy().astype(np.uint64))
+            if not first.all():
+                conflicts = chunk.loc[~first].drop(columns=TARGET, errors="ignore")
+                validation.quarantine_rows(report, conflicts, "User_ID:duplicate", quarantine_dir)
+                report.quarantined += len(conflicts)
+                report.failures["User_ID:duplicate"] = (
+                    report.failures.get("User_ID:duplicate", 0) + len(conflicts))
+                report.save(quarantine_dir)
+                if report.bad_fraction > max_bad_fraction:
+                    raise validation.DataQualityError(report)
+                chunk = chunk.loc[first]
+        if seen is not None:
+            stats.dedupe_bytes = seen.nbytes + (seen_ids.nbytes if seen_ids is not None else 0)
+        stats.rows_quarantined = report.quarantined
+        stats.quarantine_path = report.quarantine_path
+        if len(chunk):
+            stats.rows_emitted += len(chunk)
+            yield chunk.reset_index(drop=True)
+
+
+def iter_feature_batches(exercise_path=EXERCISE_CSV, calories=CALORIES_CSV,
+                         chunksize=DEFAULT_CHUNKSIZE, dedupe=True, stats=None,
+                         keep_frame=False, validate=True, max_bad_fraction=MAX_BAD_FRACTION,
+                         quarantine_dir=QUARANTINE_DIR):
+    """Yield FeatureBatch objects with the model matrix for each chunk."""
+    for chunk in iter_joined_chunks(exercise_path, calories, chunksize, dedupe, stats,
+                                    validate, max_bad_fraction, quarantine_dir):
+        yield FeatureBatch(
+            user_ids=chunk["User_ID"].to_numpy(),
+            X=build_features(chunk),
+            y=chunk[TARGET].to_numpy() if TARGET in chunk else None,
+            frame=chunk if keep_frame else None,
+        )
@@ -0,0 +1,35 @@
+"""Offline training entry point.
+
+    python -m modules.train --kind forest --out models
+
+Runs the fitness.ipynb pipeline end to end and writes a versioned model
+artifact that app.py loads memory-mapped at startup.
+"""
+import argparse
+import json
+import time
+
+from modules.data import CALORIES_CSV, EXERCISE_CSV
+from modules.ml_models import MODELS_DIR, data_fingerprint, save_model, train_model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the calorie-prediction model")
+    parser.add_argument("--kind", choices=["forest", "linear"], default="forest")
+    parser.add_argument("--exercise", default=EXERCISE_CSV, help="exercise.csv path")
+    parser.add_argument("--calories", default=CALORIES_CSV, help="calories.csv path")
+    parser.add_argument("--out", default=MODELS_DIR, help="artifact root directory")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    model = train_model(args.kind, args.exercise, args.calories)
+    model.metrics["train_seconds"] = round(time.perf_counter() - start, 3)
+    path = save_model(model, args.out, args.kind,
+                      data_fingerprint(args.exercise, args.calories))
+
+    print(f"Saved {model.version} to {path}")
+    print(json.dumps(model.metrics, indent=2))
+
+
+if __name__ == "__main__":
+    main()
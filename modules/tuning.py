@@ -0,0 +1,204 @@
+"""Successive-halving hyperparameter search for the RandomForest calorie model.
+
+    python -m modules.tuning --latency-budget-ms 1.0 --out leaderboard.csv
+
+Every candidate starts on a small sample of the training split; after each
+round only the best 1/eta by cross-validated RMSE move on to eta times more
+rows. With a latency budget, candidates whose single-row prediction (timed
+through the compiled forest the dashboard uses) is over budget are not
+promoted, so the rounds spend their fits on models that could ship. Each (params, rows, fold) fit is cached under .cache/tuning/ keyed by
+the parameters and a hash of the training data, so an interrupted or
+repeated search picks up where it left off without refitting.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import KFold, ParameterGrid, train_test_split
+
+from modules.data import CACHE_DIR
+from modules.features import build_features
+from modules.compiled import compile_estimator
+from modules.ml_models import TARGET, load_training_frame
+
+TUNING_CACHE = os.path.join(CACHE_DIR, "tuning")
+
+DEFAULT_GRID = {
+    "n_estimators": [20, 50, 100],
+    "max_depth": [8, 16, None],
+    "min_samples_leaf": [1, 3],
+    "max_features": [1.0, 0.6],
+}
+
+
+def data_hash(X, y):
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def _cache_key(params, n_rows, fold, n_folds, data_key):
+    # "latency" tags how predict_ms was measured, so older entries are refit
+    payload = json.dumps({"params": params, "rows": int(n_rows), "fold": fold,
+                          "folds": n_folds, "data": data_key, "latency": "compiled"},
+                         sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _single_row_ms(estimator, X, repeats=20):
+    # Production scores single rows through the compiled forest
+    model = compile_estimator(estimator)
+    row = X[:1]
+    model.predict(row)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predict(row)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def _evaluate_fold(params, X, y, train_idx, val_idx, cache_path, random_state):
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            return json.load(f)
+
+    estimator = RandomForestRegressor(random_state=random_state, n_jobs=1, **params)
+    start = time.perf_counter()
+    estimator.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    error = estimator.predict(X[val_idx]) - y[val_idx]
+    result = {
+        "mae": float(np.mean(np.abs(error))),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "fit_seconds": fit_seconds,
+        "predict_ms": _single_row_ms(estimator, X[val_idx]),
+    }
+    if cache_path:
+        tmp = cache_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp, cache_path)
+    return result
+
+
+def successive_halving(X, y, grid=None, eta=3, min_rows=500, n_folds=3, n_jobs=-1,
+                       cache_dir=TUNING_CACHE, random_state=1, verbose=True,
+                       latency_budget_ms=None):
+    """Run the search and return the leaderboard DataFrame, best first.
+
+    The leaderboard has one row per (candidate, round) with mean fold MAE,
+    RMSE, fit time and single-row predict latency. Only candidates within
+    latency_budget_ms (if given) are promoted to the next round.
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    candidates = list(ParameterGrid(grid or DEFAULT_GRID))
+    data_key = data_hash(X, y)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    # One fixed shuffle so the rows used in every round are a prefix of the next
+    order = np.random.RandomState(random_state).permutation(len(X))
+    rows = []
+    n_rows = min(min_rows, len(X))
+    round_no = 0
+
+    while True:
+        subset = order[:n_rows]
+        folds = list(KFold(n_folds, shuffle=True, random_state=random_state).split(subset))
+        tasks = []
+        for params in candidates:
+            for fold, (train_idx, val_idx) in enumerate(folds):
+                cache_path = None
+                if cache_dir:
+                    key = _cache_key(params, n_rows, fold, n_folds, data_key)
+                    cache_path = os.path.join(cache_dir, f"{key}.json")
+                tasks.append(delayed(_evaluate_fold)(
+                    params, X, y, subset[train_idx], subset[val_idx], cache_path, random_state))
+        results = Parallel(n_jobs=n_jobs)(tasks)
+
+        scored = []
+        for i, params in enumerate(candidates):
+            folds_result = pd.DataFrame(results[i * n_folds:(i + 1) * n_folds])
+            summary = folds_result.mean().to_dict()
+            summary.update(params=params, rows=n_rows, round=round_no)
+            scored.append(summary)
+        scored.sort(key=lambda r: r["rmse"])
+        rows.extend(scored)
+        if verbose:
+            best = scored[0]
+            print(f"round {round_no}: {len(candidates)} candidates on {n_rows} rows, "
+                  f"best RMSE {best['rmse']:.3f} {best['params']}")
+
+        eligible = [r for r in scored
+                    if latency_budget_ms is None or r["predict_ms"] <= latency_budget_ms]
+        if len(candidates) == 1 or n_rows == len(X) or not eligible:
+            break
+        candidates = [r["params"] for r in eligible[:max(1, len(candidates) // eta)]]
+        n_rows = min(n_rows * eta, len(X))
+        round_no += 1
+
+    leaderboard = pd.DataFrame(rows)
+    leaderboard = leaderboard.sort_values(["round", "rmse"], ascending=[False, True])
+    columns = ["round", "rows", "mae", "rmse", "fit_seconds", "predict_ms", "params"]
+    return leaderboard[columns].reset_index(drop=True)
+
+
+def pick(leaderboard, latency_budget_ms=None, max_rmse=None):
+    """Best row that satisfies the latency/accuracy targets.
+
+    Rows from every round are considered; among those that qualify, the
+    latest round (most training rows, so the most reliable RMSE) wins, then
+    the lowest RMSE within it.
+    """
+    pool = leaderboard
+    if latency_budget_ms is not None:
+        pool = pool[pool["predict_ms"] <= latency_budget_ms]
+    if max_rmse is not None:
+        pool = pool[pool["rmse"] <= max_rmse]
+    if pool.empty:
+        return None
+    return pool.sort_values(["round", "rmse"], ascending=[False, True]).iloc[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the RandomForest calorie model")
+    parser.add_argument("--eta", type=int, default=3, help="halving factor")
+    parser.add_argument("--min-rows", type=int, default=500)
+    parser.add_argument("--folds", type=int, default=3)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--latency-budget-ms", type=float, help="max single-row predict time")
+    parser.add_argument("--max-rmse", type=float)
+    parser.add_argument("--no-cache", action="store_true", help="refit every fold")
+    parser.add_argument("--out", help="write the leaderboard as CSV")
+    args = parser.parse_args(argv)
+
+    exercise_df = load_training_frame()
+    train, _ = train_test_split(exercise_df, test_size=0.2, random_state=1)
+    leaderboard = successive_halving(
+        build_features(train), train[TARGET].to_numpy(), eta=args.eta,
+        min_rows=args.min_rows, n_folds=args.folds, n_jobs=args.n_jobs,
+        cache_dir=None if args.no_cache else TUNING_CACHE,
+        latency_budget_ms=args.latency_budget_ms,
+    )
+
+    with pd.option_context("display.max_colwidth", 80, "display.width", 160):
+        print(leaderboard.head(15).round(3).to_string())
+    if args.out:
+        leaderboard.to_csv(args.out, index=False)
+
+    best = pick(leaderboard, args.latency_budget_ms, args.max_rmse)
+    if best is None:
+        print("No candidate meets the latency/accuracy targets")
+    else:
+        print(f"Selected {best['params']}: RMSE {best['rmse']:.3f}, MAE {best['mae']:.3f}, "
+              f"fit {best['fit_seconds']:.2f}s, predict {best['predict_ms']:.3f} ms/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Data-quality checks for exercise/calories exports, run on ingest.
+
+    python -m modules.validation                        # check the bundled CSVs
+    python -m modules.validation --exercise export.csv --max-bad-fraction 0
+
+Every check is a whole-column NumPy operation: required columns, values
+that are not numbers (or not integers where the schema says int), missing
+values, plausible ranges (Age, Heart_Rate, Body_Temp, ...), unknown Gender
+labels (compared case-insensitively, and lower-cased in the clean output)
+and User_IDs repeated with different values (the first valid row is kept).
+Rows failing any check are written to
+.cache/quarantine/<file>.quarantine.csv with the names of the checks they
+failed and dropped; exact duplicate rows are dropped as the notebook always
+did. Batch scoring, where one user has many sessions, keeps duplicates and
+skips the User_ID check. Missing columns, or more than max_bad_fraction of
+the rows failing, raise DataQualityError so a bad export stops before it is
+cached or trained on. A JSON report is written next to the quarantine file.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from modules.data import (CACHE_DIR, CALORIES_CSV, CALORIES_DTYPES, EXERCISE_CSV,
+                          EXERCISE_DTYPES)
+from modules.features import CATEGORIES
+
+QUARANTINE_DIR = os.path.join(CACHE_DIR, "quarantine")
+MAX_BAD_FRACTION = 0.01
+
+SCHEMAS = {"exercise": EXERCISE_DTYPES, "calories": CALORIES_DTYPES}
+# Inclusive bounds of physiologically plausible values
+RANGES = {
+    "Age": (1, 120),
+    "Heart_Rate": (30, 250),
+    "Body_Temp": (34.0, 43.0),
+    "Height": (50, 260),
+    "Weight": (20, 350),
+    "Duration": (0, 1440),
+    "Calories": (0, 10_000),
+}
+LABELS = CATEGORIES
+
+
+class DataQualityError(ValueError):
+    def __init__(self, report):
+        super().__init__(f"Data-quality check failed: {report.summary()}")
+        self.report = report
+
+
+@dataclass
+class ValidationReport:
+    table: str
+    source: str = None
+    rows: int = 0
+    quarantined: int = 0
+    duplicates: int = 0  # exact repeats
+    keep_duplicates: bool = False  # counted but left in the clean frame
+    failures: dict = field(default_factory=dict)  # check -> rows failing it
+    missing_columns: list = field(default_factory=list)
+    extra_columns: list = field(default_factory=list)
+    quarantine_path: str = None
+    seconds: float = 0.0
+
+    @property
+    def bad_fraction(self):
+        return self.quarantined / self.rows if self.rows else 0.0
+
+    @property
+    def ok(self):
+        return not self.missing_columns and not self.quarantined
+
+    def summary(self):
+        name = os.path.basename(self.source) if self.source else self.table
+        if self.missing_columns:
+            return f"{name}: missing columns {', '.join(self.missing_columns)}"
+        text = (f"{name}: {self.rows} rows, {self.quarantined} quarantined "
+                f"({self.bad_fraction:.2%}), {self.duplicates} duplicates "
+                f"{'kept' if self.keep_duplicates else 'dropped'}")
+        if self.failures:
+            text += " [" + ", ".join(f"{k} {v}" for k, v in sorted(self.failures.items())) + "]"
+        return text
+
+    def as_dict(self):
+        return {**asdict(self), "bad_fraction": self.bad_fraction, "ok": self.ok}
+
+    def save(self, directory=QUARANTINE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        stale = os.path.join(directory, f"{_stem(self)}.quarantine.csv")
+        if self.quarantine_path is None and os.path.exists(stale):
+            os.remove(stale)  # left by an earlier run of the same file
+        path = os.path.join(directory, f"{_stem(self)}.report.json")
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+        return path
+
+
+def _stem(report):
+    return os.path.splitext(os.path.basename(report.source))[0] if report.source else report.table
+
+
+def _raw_dtypes(table):
+    # float64 never fails on blanks or fractions, so those become checkable values
+    return {col: ("category" if col in LABELS else "float64") for col in SCHEMAS[table]}
+
+
+def _coerce(text, table):
+    """Parse a table read as text; returns (frame, {column: non-numeric mask})."""
+    unparseable = {}
+    for col in SCHEMAS[table]:
+        if col not in text:
+            continue
+        if col in LABELS:
+            text[col] = text[col].astype("category")
+            continue
+        values = pd.to_numeric(text[col], errors="coerce")
+        unparseable[col] = (values.isna() & text[col].notna()).to_numpy()
+        text[col] = values.astype("float64")
+    return text, unparseable
+
+
+def read_raw(path, table, **kwargs):
+    """Read a table for validation: (frame, {column: non-numeric mask}).
+
+    Numeric columns are parsed as float64, as fast as the typed read; only a
+    file containing non-numeric tokens is re-read as text and coerced.
+    """
+    try:
+        return pd.read_csv(path, dtype=_raw_dtypes(table), **kwargs), {}
+    except ValueError:
+        return _coerce(pd.read_csv(path, dtype=str, **kwargs), table)
+
+
+def iter_raw(path, table, chunksize):
+    """read_raw in chunks.
+
+    Chunks are parsed as float64 until one contains a non-numeric token; the
+    rest of the file, from that chunk on, is then read once as text and
+    coerced, so a bad row costs one slower pass rather than a re-read.
+    """
+    done = 0
+    with pd.read_csv(path, dtype=_raw_dtypes(table), chunksize=chunksize) as reader:
+        try:
+            for chunk in reader:
+                chunk.index = pd.RangeIndex(done, done + len(chunk))
+                done += len(chunk)
+                yield chunk, {}
+            return
+        except ValueError:
+            pass
+    with pd.read_csv(path, dtype=str, chunksize=chunksize,
+                     skiprows=range(1, done + 1)) as reader:
+        for text in reader:
+            text.index = pd.RangeIndex(done, done + len(text))
+            done += len(text)
+            yield _coerce(text, table)
+
+
+def _lowered(labels):
+    """Lower-cased labels as objects (NaN stays None), computed once per category."""
+    labels = labels.astype("category")
+    lowered = np.array([str(c).lower() for c in labels.cat.categories] + [None], dtype=object)
+    return pd.Series(lowered[labels.cat.codes.to_numpy()], index=labels.index)
+
+
+def check(df, table, unparseable=None, unique_ids=True):
+    """({check: row mask} for every failing check, exact-duplicate row mask)."""
+    failures = {}
+
+    def flag(name, mask):
+        if mask.any():
+            failures[name] = mask
+
+    for col, dtype in SCHEMAS[table].items():
+        if col in LABELS:
+            labels = _lowered(df[col])
+            flag(f"{col}:missing", labels.isna().to_numpy())
+            flag(f"{col}:label", (labels.notna() & ~labels.isin(LABELS[col])).to_numpy())
+            continue
+        values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+        missing = np.isnan(values)
+        tokens = (unparseable or {}).get(col)
+        if tokens is not None:
+            flag(f"{col}:not_numeric", tokens)
+            missing &= ~tokens
+        flag(f"{col}:missing", missing)
+        if np.dtype(dtype).kind in "iu":
+            flag(f"{col}:not_integer", np.isfinite(values) & (values != np.floor(values)))
+        if col in RANGES:
+            low, high = RANGES[col]
+            with np.errstate(invalid="ignore"):
+                flag(f"{col}:range", (values < low) | (values > high))
+
+    exact = df.duplicated(keep="first").to_numpy()
+    if unique_ids:
+        # A User_ID repeated with different values: keep the first valid row,
+        # as streaming does for repeats in later chunks, so the outcome does
+        # not depend on where chunk boundaries fall
+        candidates = ~exact
+        for mask in failures.values():
+            candidates &= ~mask
+        conflict = np.zeros(len(df), dtype=bool)
+        conflict[candidates] = df["User_ID"][candidates].duplicated(keep="first").to_numpy()
+        flag("User_ID:duplicate", conflict)
+    return failures, exact
+
+
+def quarantine_rows(report, rows, reasons, directory=QUARANTINE_DIR):
+    """Append rows (with a _failed column of reasons) to the report's quarantine file."""
+    os.makedirs(directory, exist_ok=True)
+    first = report.quarantine_path is None
+    if first:
+        report.quarantine_path = os.path.join(directory, f"{_stem(report)}.quarantine.csv")
+    # float32 columns (typed chunks) print as written in the source, not 40.09999847
+    rows = rows.astype({col: str for col in rows if rows[col].dtype == np.float32})
+    rows.assign(_line=rows.index + 2, _failed=reasons).to_csv(
+        report.quarantine_path, mode="w" if first else "a", header=first, index=False,
+        float_format="%.10g")
+
+
+def validate(df, table, report=None, unparseable=None, max_bad_fraction=MAX_BAD_FRACTION,
+             quarantine_dir=QUARANTINE_DIR, drop_duplicates=True, unique_ids=True):
+    """Check df, quarantine failing rows and return (clean typed frame, report).
+
+    Call repeatedly with the same report to validate a file chunk by chunk;
+    the bad fraction is checked against the running totals after each call.
+    With drop_duplicates=False exact repeats are counted but kept; with
+    unique_ids=False a User_ID may repeat with different values.
+    """
+    start = time.perf_counter()
+    report = report if report is not None else ValidationReport(table)
+    report.keep_duplicates = not drop_duplicates
+    expected = SCHEMAS[table]
+    report.missing_columns = [col for col in expected if col not in df.columns]
+    report.extra_columns = [col for col in df.columns if col not in expected]
+    if report.missing_columns:
+        raise DataQualityError(report)
+    df = df[list(expected)]
+
+    failures, exact = check(df, table, unparseable, unique_ids)
+    bad = np.zeros(len(df), dtype=bool)
+    for mask in failures.values():
+        bad |= mask
+    report.rows += len(df)
+    report.quarantined += int(bad.sum())
+    report.duplicates += int((exact & ~bad).sum())
+    for name, mask in failures.items():
+        report.failures[name] = report.failures.get(name, 0) + int(mask.sum())
+    if bad.any():
+        reasons = np.full(int(bad.sum()), "", dtype=object)
+        for name, mask in failures.items():
+            hit = mask[bad]
+            reasons[hit] = reasons[hit] + ";" + name
+        quarantine_rows(report, df[bad], [r[1:] for r in reasons], quarantine_dir)
+
+    clean = df[~(bad | exact) if drop_duplicates else ~bad].astype(expected)
+    for col in LABELS:
+        if col in clean:
+            clean[col] = _lowered(clean[col]).astype("category")
+    report.seconds += time.perf_counter() - start
+    if report.bad_fraction > max_bad_fraction:
+        raise DataQualityError(report)
+    return clean, report
+
+
+def read_validated(path, table, max_bad_fraction=MAX_BAD_FRACTION, quarantine_dir=QUARANTINE_DIR):
+    """Read and validate a whole file: (clean frame, report); the report is saved either way."""
+    report = ValidationReport(table, os.path.abspath(path))
+    start = time.perf_counter()
+    try:
+        df, unparseable = read_raw(path, table)
+        report.seconds += time.perf_counter() - start
+        return validate(df, table, report, unparseable, max_bad_fraction, quarantine_dir)
+    finally:
+        report.save(quarantine_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate exercise/calories exports")
+    parser.add_argument("--exercise", default=EXERCISE_CSV)
+    parser.add_argument("--calories", default=CALORIES_CSV)
+    parser.add_argument("--max-bad-fraction", type=float, default=MAX_BAD_FRACTION)
+    parser.add_argument("--quarantine-dir", default=QUARANTINE_DIR)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for table, path in (("exercise", args.exercise), ("calories", args.calories)):
+        try:
+            _, report = read_validated(path, table, args.max_bad_fraction, args.quarantine_dir)
+            print(f"OK    {report.summary()}")
+        except DataQualityError as exc:
+            failed = True
+            print(f"FAIL  {exc.report.summary()}")
+            report = exc.report
+        if report.quarantine_path:
+            print(f"      quarantined rows: {report.quarantine_path}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import train_test_split
+
+from modules.compiled import (CompiledForest, CompiledLinear, compile_estimator,
+                              load_compiled, save_compiled)
+from modules.features import build_features
+from modules.ml_models import TARGET, load_training_frame
+
+
+@pytest.fixture(scope="module")
+def split():
+    train, test = train_test_split(load_training_frame(), test_size=0.2, random_state=1)
+    return (build_features(train), train[TARGET].to_numpy(),
+            build_features(test), test[TARGET].to_numpy())
+
+
+@pytest.mark.parametrize("estimator, kind", [
+    (RandomForestRegressor(n_estimators=10, max_depth=12, random_state=1), CompiledForest),
+    (LinearRegression(), CompiledLinear),
+])
+def test_matches_sklearn_on_the_test_split(split, tmp_path, estimator, kind):
+    X_train, y_train, X_test, _ = split
+    estimator.fit(X_train, y_train)
+    expected = estimator.predict(X_test)
+
+    compiled = compile_estimator(estimator)
+    assert isinstance(compiled, kind)
+    np.testing.assert_allclose(compiled.predict(X_test), expected, rtol=0, atol=1e-9)
+    # The single-row path the dashboard takes
+    np.testing.assert_allclose(compiled.predict(X_test[:1]), expected[:1], rtol=0, atol=1e-9)
+
+    save_compiled(compiled, str(tmp_path))
+    mapped = load_compiled(str(tmp_path), mmap_mode="r")
+    assert isinstance(mapped, kind)
+    mapped_array = mapped.threshold if kind is CompiledForest else mapped.coef
+    assert isinstance(mapped_array.base, np.memmap)
+    np.testing.assert_allclose(mapped.predict(X_test), expected, rtol=0, atol=1e-9)
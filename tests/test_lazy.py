@@ -0,0 +1,33 @@
+import sys
+import threading
+
+import pytest
+
+from modules.lazy import lazy_import
+
+
+def test_concurrent_first_access(monkeypatch):
+    monkeypatch.delitem(sys.modules, "modules.charts", raising=False)
+    charts = lazy_import("modules.charts")
+    barrier = threading.Barrier(4)
+    found, errors = [], []
+
+    def first_access():
+        barrier.wait()
+        try:
+            found.append(charts.line_chart)
+        except AttributeError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=first_access) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(set(found)) == 1
+
+
+def test_missing_module():
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import("modules.no_such_module")
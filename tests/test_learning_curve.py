@@ -0,0 +1,25 @@
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+from modules.learning_curve import learning_curve
+
+
+def rmse(y_true, y_pred):
+    return np.sqrt(np.mean((y_true - y_pred) ** 2))
+
+
+def test_normal_equations_match_refits_on_unsorted_sizes():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(600, 4))
+    y = X @ [3.0, -1.0, 0.5, 2.0] + 7 + rng.normal(scale=0.3, size=600)
+    X_train, y_train, X_val, y_val = X[:500], y[:500], X[500:], y[500:]
+    sizes = [300, 10, 500, 10, 60]
+
+    curve = learning_curve(LinearRegression(), X_train, y_train, X_val, y_val, sizes=sizes)
+
+    assert curve.method == "normal-equations"
+    assert curve.sizes.tolist() == sizes
+    for m, train_rmse, val_rmse in zip(sizes, curve.train_rmse, curve.val_rmse):
+        model = LinearRegression().fit(X_train[:m], y_train[:m])
+        assert np.isclose(train_rmse, rmse(y_train[:m], model.predict(X_train[:m])), rtol=1e-6)
+        assert np.isclose(val_rmse, rmse(y_val, model.predict(X_val)), rtol=1e-6)
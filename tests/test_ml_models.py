@@ -0,0 +1,30 @@
+import numpy as np
+
+from modules import ml_models
+from modules.compiled import load_compiled
+
+
+def test_saves_get_unique_versions_and_compiled_arrays_are_mapped(tmp_path):
+    model = ml_models.train_model("linear")
+    first = ml_models.save_model(model, str(tmp_path), kind="linear", data_hash="abc123")
+    second = ml_models.save_model(model, str(tmp_path), kind="linear", data_hash="abc123")
+    assert first != second
+    assert ml_models.latest_model_path(str(tmp_path)) == second
+
+    loaded = ml_models.load_model(second, mmap_mode="r")
+    assert isinstance(loaded.compiled.coef.base, np.memmap)
+    X = np.random.default_rng(1).normal(size=(5, len(ml_models.FEATURES)))
+    np.testing.assert_allclose(loaded.predict(X), model.predict(X))
+    eager = load_compiled(second)
+    np.testing.assert_array_equal(eager.coef, loaded.compiled.coef)
+
+
+def test_estimator_is_only_loaded_for_large_batches(tmp_path):
+    model = ml_models.train_model("linear")
+    loaded = ml_models.load_model(ml_models.save_model(model, str(tmp_path), kind="linear"))
+    X = np.random.default_rng(1).normal(size=(ml_models.COMPILED_MAX_ROWS + 1, len(model.features)))
+
+    np.testing.assert_allclose(loaded.predict(X[:-1]), model.predict(X[:-1]))
+    assert loaded._estimator is None
+    np.testing.assert_allclose(loaded.predict(X), model.predict(X))
+    assert loaded.estimator is not None
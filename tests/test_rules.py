@@ -0,0 +1,24 @@
+from datetime import date, timedelta
+
+from modules.rules import RulesEngine
+from modules.storage import FitnessStore
+
+TODAY = date(2026, 10, 18)
+
+
+def test_backdated_rows_match_a_replay(tmp_path):
+    store = FitnessStore(str(tmp_path / "fitness.db"))
+    engine = RulesEngine(store)
+    for days_ago, steps, water in ((0, 4000, 500), (2, 6000, 750), (1, 3000, 250)):
+        day = TODAY - timedelta(days=days_ago)
+        store.add_workouts([{"user": "ana", "day": day, "workout_type": "Run",
+                             "duration_min": 30, "calories": 200, "steps": steps}])
+        store.add_nutrition([{"user": "ana", "day": day, "water_ml": water}])
+
+    live = engine.state("ana")
+    assert (live.steps, live.water_ml, live.workouts) == (13000, 1500, 3)
+    assert live.best_day_steps == 6000
+    assert live.streak == live.best_streak == 3
+    assert live.current_streak(TODAY) == 3
+    assert live == RulesEngine(store).state("ana")
+    store.close()
@@ -0,0 +1,18 @@
+import time
+
+from modules.sensors import SensorHub
+
+
+def test_malformed_samples_are_counted_not_fatal():
+    hub = SensorHub()
+    now = time.time()
+    hub.ingest([
+        {"user": "ana", "ts": now, "heart_rate": 120, "steps": "abc"},
+        {"user": ["ana"], "ts": now, "heart_rate": 120},
+        {"user": "ana", "ts": now, "heart_rate": "fast"},
+        42,
+        {"user": "ana", "ts": now, "heart_rate": 120, "steps": 3},
+    ])
+    assert hub.stats()["malformed"] == 4
+    assert hub.stats()["samples"] == 1
+    assert hub.snapshot("ana", now=now)["steps"] == 3
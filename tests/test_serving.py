@@ -0,0 +1,88 @@
+import asyncio
+import os
+import signal
+import threading
+
+import numpy as np
+import pytest
+
+from modules import ml_models
+from modules.serving import PredictionClient, PredictionServer
+
+PROFILE = dict(age=30, weight=70, height=175, duration=20, heart_rate=100, gender="male")
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    model = ml_models.train_model("linear")
+    return ml_models.save_model(model, str(tmp_path_factory.mktemp("models")), kind="linear")
+
+
+@pytest.fixture
+def server(model_path, tmp_path):
+    server = PredictionServer(model_path, workers=1)
+    address = f"unix:{tmp_path}/serve.sock"
+    ready = threading.Event()
+    running = {}
+
+    async def run():
+        running["loop"] = asyncio.get_running_loop()
+        running["task"] = asyncio.current_task()
+        await server.serve(address, ready)
+
+    def target():
+        try:
+            asyncio.run(run())
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    assert ready.wait(30)
+    yield server, address
+    running["loop"].call_soon_threadsafe(running["task"].cancel)
+    thread.join(10)
+
+
+def test_predict_one_survives_a_killed_worker(server):
+    server, address = server
+    client = PredictionClient(address, timeout=10)
+    before, _ = client.predict_one(**PROFILE)
+
+    for pid in list(server.executor._processes):
+        os.kill(pid, signal.SIGKILL)
+    kcal, _ = client.predict_one(**PROFILE)
+
+    assert kcal == pytest.approx(before)
+    assert client.fallbacks == 0  # answered by the rebuilt pool, not the fallback
+    assert client.stats()["server"]["pool_restarts"] == 1
+    client.close()
+
+
+def test_client_follows_the_server_version(server):
+    server, address = server
+    client = PredictionClient(address, timeout=10)
+    assert client.version == server.info["version"]
+
+    client._info = {**server.info, "version": "retired"}
+    assert client.version == "retired"
+    client.predict_one(**PROFILE)  # answered by the server's current version
+    assert client.version == server.info["version"]
+    client.close()
+
+
+class ZeroModel:
+    def predict(self, X):
+        return np.zeros(len(X))
+
+
+def test_server_error_falls_back(server):
+    _, address = server
+    client = PredictionClient(address, timeout=10, fallback=ZeroModel)
+    # Wrong number of features: the server answers {"error": ...}
+    assert client.predict(np.ones((2, 3))).tolist() == [0.0, 0.0]
+    assert client.fallbacks == 1
+    # ...without sending the next, valid request to the fallback too
+    client.predict_one(**PROFILE)
+    assert (client.served, client.fallbacks) == (1, 1)
+    client.close()
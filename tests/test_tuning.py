@@ -0,0 +1,23 @@
+import numpy as np
+
+from modules import tuning
+
+
+def test_latency_budget_applies_when_promoting(monkeypatch):
+    # Stand-in latency that grows with the forest size
+    monkeypatch.setattr(tuning, "_single_row_ms",
+                        lambda estimator, X: estimator.n_estimators / 10)
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(600, 3))
+    y = X @ [2.0, -1.0, 0.5] + rng.normal(scale=0.1, size=600)
+    grid = {"n_estimators": [2, 5, 60], "max_depth": [6]}
+
+    board = tuning.successive_halving(X, y, grid, eta=3, min_rows=200, n_jobs=1,
+                                      cache_dir=None, verbose=False, latency_budget_ms=1.0)
+    final = board[board["round"] == board["round"].max()]
+    assert board["round"].max() == 1
+    # Without the budget the 60-tree forest wins round 0 and is promoted
+    assert [p["n_estimators"] for p in final["params"]] == [5]
+
+    best = tuning.pick(board, latency_budget_ms=1.0)
+    assert best["round"] == 1 and best["predict_ms"] <= 1.0
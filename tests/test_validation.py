@@ -0,0 +1,65 @@
+import io
+
+import pandas as pd
+
+from modules.streaming import iter_feature_batches
+from modules.validation import ValidationReport, iter_raw, validate
+
+HEADER = "User_ID,Gender,Age,Height,Weight,Duration,Heart_Rate,Body_Temp\n"
+
+
+def rows(n, start=0):
+    return "".join(f"{10_000 + i},male,30,175.0,70.0,20.0,100.0,40.1\n"
+                   for i in range(start, start + n))
+
+
+def test_labels_are_case_insensitive(tmp_path):
+    df = pd.read_csv(io.StringIO(
+        HEADER + "1,Male,30,175,70,20,100,40\n2,FEMALE,30,175,70,20,100,40\n"
+        "3,robot,30,175,70,20,100,40\n"))
+    clean, report = validate(df, "exercise", max_bad_fraction=1.0, quarantine_dir=tmp_path)
+    assert report.failures == {"Gender:label": 1}
+    assert clean["Gender"].tolist() == ["male", "female"]
+
+
+def test_iter_raw_recovers_after_a_bad_chunk(tmp_path):
+    path = tmp_path / "exercise.csv"
+    path.write_text(HEADER + rows(10) + "99,male,thirty,175.0,70.0,20.0,100.0,40.1\n"
+                    + rows(25, start=10))
+    chunks = list(iter_raw(path, "exercise", chunksize=10))
+    assert [len(chunk) for chunk, _ in chunks] == [10, 10, 10, 6]
+    assert pd.concat([chunk for chunk, _ in chunks]).index.tolist() == list(range(36))
+    assert chunks[1][1]["Age"].tolist() == [True] + [False] * 9
+
+    report = ValidationReport("exercise")
+    for chunk, tokens in chunks:
+        validate(chunk, "exercise", report, tokens, max_bad_fraction=1.0,
+                 quarantine_dir=tmp_path)
+    assert (report.rows, report.quarantined) == (36, 1)
+
+
+def test_repeated_ids_do_not_depend_on_chunk_size(tmp_path):
+    path = tmp_path / "exercise.csv"
+    path.write_text(HEADER + "1,male,30,175,70,20,100,40\n2,male,31,175,70,20,100,40\n"
+                    "1,male,32,175,70,20,100,40\n3,male,33,175,70,20,100,40\n"
+                    "1,male,34,175,70,20,100,40\n")
+    calories = tmp_path / "calories.csv"
+    calories.write_text("User_ID,Calories\n1,100\n2,200\n3,300\n")
+
+    def ids(chunksize, **kwargs):
+        batches = iter_feature_batches(str(path), chunksize=chunksize, **kwargs)
+        return [int(i) for batch in batches for i in batch.user_ids]
+
+    # Scoring: every session is scored whatever the batch size
+    assert ids(5, calories=None, dedupe=False) == ids(2, calories=None, dedupe=False) \
+        == [1, 2, 1, 3, 1]
+    # Training: the first row of a repeated User_ID is kept, in or across chunks
+    training = dict(calories=str(calories), max_bad_fraction=1.0, quarantine_dir=tmp_path)
+    assert ids(5, **training) == ids(2, **training) == [1, 2, 3]
+
+
+def test_batch_streaming_keeps_duplicates(tmp_path):
+    path = tmp_path / "score.csv"
+    path.write_text(HEADER + rows(5) + rows(5))
+    batches = iter_feature_batches(str(path), calories=None, chunksize=4, dedupe=False)
+    assert sum(len(batch) for batch in batches) == 10